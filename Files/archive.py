@@ -0,0 +1,247 @@
+import os
+import zlib
+import shutil
+import fnmatch
+import zipfile
+import posixpath
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from metrics import count
+from checksum import new_hash
+
+CHUNK_SIZE = 1024 * 1024
+# Deflated members are kept in memory up to this size before spilling to disk
+SPOOL_SIZE = 8 * 1024 * 1024
+# Members whose first block deflates to more than this ratio are stored
+SAMPLE_SIZE = 64 * 1024
+STORE_RATIO = 0.97
+STORED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic',
+    '.gz', '.tgz', '.bz2', '.xz', '.zst', '.lz4', '.zip', '.7z', '.rar', '.jar', '.whl',
+    '.mp3', '.mp4', '.m4a', '.m4v', '.mkv', '.mov', '.avi', '.webm', '.ogg', '.flac',
+}
+
+def collect_members(src_path, base_path):
+    """Return (file_path, arcname, size) for every file under src_path"""
+    if not os.path.isdir(src_path):
+        return [(src_path, os.path.basename(src_path), os.path.getsize(src_path))]
+    members = []
+    stack = [src_path]
+    while stack:
+        dir_path = stack.pop()
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        count(entries=len(entries))
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.is_file():
+                count(stats=1)
+                members.append((entry.path, os.path.relpath(entry.path, base_path), entry.stat().st_size))
+    return members
+
+def _deflate(file_path, level, progress, verify=None):
+    """Raw-deflate a file into a spooled temp file; return (spool, crc, compressed size, digest).
+
+    Returns None when a fast sample of the first block shows the data does not
+    compress, so the member can be stored without deflating it all. digest is
+    the verify hash of the data read, or None without verify.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    crc = 0
+    with open(file_path, 'rb') as f:
+        chunk = f.read(CHUNK_SIZE)
+        sample = chunk[:SAMPLE_SIZE]
+        if len(sample) == SAMPLE_SIZE and len(zlib.compress(sample, 1)) > len(sample) * STORE_RATIO:
+            return None
+        digest = new_hash(verify) if verify else None
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        while chunk:
+            crc = zlib.crc32(chunk, crc)
+            if digest is not None:
+                digest.update(chunk)
+            spool.write(compressor.compress(chunk))
+            if progress:
+                progress.update(len(chunk))
+            chunk = f.read(CHUNK_SIZE)
+    spool.write(compressor.flush())
+    compress_size = spool.tell()
+    spool.seek(0)
+    return spool, crc, compress_size, digest and digest.hexdigest()
+
+def _can_write_raw(zf):
+    """Whether zf has the zipfile internals _write_deflated relies on (CPython 3.6 to 3.13 do)"""
+    return (all(hasattr(zf, name) for name in ('fp', '_writecheck', '_didModify', 'start_dir', 'NameToInfo'))
+            and hasattr(zipfile.ZipInfo, 'FileHeader'))
+
+def _write_deflated(zf, zinfo, spool, crc, compress_size):
+    # Member data was compressed by a worker, so write header and data directly
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = crc
+    zinfo.compress_size = compress_size
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or compress_size > zipfile.ZIP64_LIMIT
+    zinfo.header_offset = zf.fp.tell()
+    zf._writecheck(zinfo)
+    zf._didModify = True
+    zf.fp.write(zinfo.FileHeader(zip64))
+    shutil.copyfileobj(spool, zf.fp, CHUNK_SIZE)
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = zf.fp.tell()
+
+def _write_streamed(zf, zinfo, file_path, progress, verify=None, compress_type=zipfile.ZIP_STORED):
+    zinfo.compress_type = compress_type
+    digest = new_hash(verify) if verify else None
+    with open(file_path, 'rb') as src, zf.open(zinfo, 'w', force_zip64=zinfo.file_size > zipfile.ZIP64_LIMIT) as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            dst.write(chunk)
+            if digest is not None:
+                digest.update(chunk)
+            if progress:
+                progress.update(len(chunk))
+    return digest and digest.hexdigest()
+
+def compress(members, zip_path, level=6, workers=None, progress=None, verify=None):
+    """Write members into zip_path, deflating them on a worker pool.
+
+    Members are written in their original order; at most a few members per
+    worker are in flight and each is streamed in chunks, so memory stays
+    bounded. Already-compressed formats, and files whose first block does not
+    deflate, are stored instead. Should zipfile lack the internals used to
+    write pre-deflated data, members are deflated by zipfile itself on the
+    calling thread, at zlib's default level.
+
+    With verify set to an algorithm name each member is hashed while it is
+    read for compression, and a dict of arcname to digest is returned for
+    verify_archive().
+    """
+    workers = workers or os.cpu_count() or 1
+    digests = {}
+    with zipfile.ZipFile(zip_path, 'w') as zf, ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        raw = _can_write_raw(zf)
+
+        def write_next():
+            zinfo, file_path, future, compress_type = pending.popleft()
+            deflated = future.result() if future else None
+            if deflated is None:
+                digests[zinfo.filename] = _write_streamed(zf, zinfo, file_path, progress, verify, compress_type)
+                return
+            spool, crc, compress_size, digests[zinfo.filename] = deflated
+            with spool:
+                _write_deflated(zf, zinfo, spool, crc, compress_size)
+
+        for file_path, arcname, _ in members:
+            zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+            future = None
+            compress_type = zipfile.ZIP_STORED
+            if os.path.splitext(file_path)[1].lower() not in STORED_EXTENSIONS:
+                if raw:
+                    # Stored only if the worker finds the data does not compress
+                    future = pool.submit(_deflate, file_path, level, progress, verify)
+                else:
+                    compress_type = zipfile.ZIP_DEFLATED
+            pending.append((zinfo, file_path, future, compress_type))
+            if len(pending) >= workers * 2:
+                write_next()
+        while pending:
+            write_next()
+    return digests if verify else None
+
+def _verify_bucket(zip_path, names, digests, verify):
+    failures = []
+    with zipfile.ZipFile(zip_path) as zf:
+        for name in names:
+            digest = new_hash(verify)
+            try:
+                # Reading to the end also checks the member's CRC
+                with zf.open(name) as member:
+                    while True:
+                        chunk = member.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+            except (OSError, zipfile.BadZipFile, zlib.error) as e:
+                failures.append((name, e))
+                continue
+            if digest.hexdigest() != digests[name]:
+                failures.append((name, f"{verify} does not match the source"))
+    return failures
+
+def verify_archive(zip_path, digests, verify, workers=None):
+    """Read every member back and compare it with the digest taken while compressing.
+
+    Returns a list of (name, error); each worker reads through its own ZipFile.
+    """
+    workers = workers or os.cpu_count() or 1
+    names = sorted(digests)
+    buckets = [names[i::workers] for i in range(min(workers, len(names)) or 1)]
+    with ThreadPoolExecutor(max_workers=len(buckets)) as pool:
+        results = pool.map(lambda bucket: _verify_bucket(zip_path, bucket, digests, verify), buckets)
+        return [failure for failures in results for failure in failures]
+
+def select_members(zip_path, patterns=None):
+    """Read the central directory once and return members matching any glob pattern"""
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = zf.infolist()
+    if not patterns:
+        return infos
+    return [info for info in infos
+            if any(fnmatch.fnmatch(info.filename, pattern) or fnmatch.fnmatch(posixpath.basename(info.filename.rstrip('/')), pattern)
+                   for pattern in patterns)]
+
+def _member_target(dst_path, filename):
+    # Drop absolute prefixes and '..' so members cannot escape dst_path
+    parts = [part for part in filename.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+    return os.path.join(dst_path, *parts) if parts else None
+
+def _extract_bucket(zip_path, bucket, progress):
+    failures = []
+    with zipfile.ZipFile(zip_path) as zf:
+        for info, target in bucket:
+            try:
+                with zf.open(info) as src, open(target, 'wb') as dst:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        if progress:
+                            progress.update(len(chunk))
+            except (OSError, zipfile.BadZipFile, zlib.error) as e:
+                failures.append((info.filename, e))
+    return failures
+
+def extract(zip_path, infos, dst_path, workers=None, progress=None):
+    """Extract members concurrently and return a list of (name, error) failures.
+
+    Members are spread over workers largest-first so each gets a similar number
+    of bytes, and every worker reads through its own ZipFile handle instead of
+    contending for the position of a shared one.
+    """
+    workers = workers or os.cpu_count() or 1
+    files = []
+    for info in infos:
+        target = _member_target(dst_path, info.filename)
+        if target is None:
+            continue
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            files.append((info, target))
+
+    buckets = [[] for _ in range(min(workers, len(files)) or 1)]
+    loads = [0] * len(buckets)
+    for info, target in sorted(files, key=lambda item: item[0].file_size, reverse=True):
+        i = loads.index(min(loads))
+        buckets[i].append((info, target))
+        loads[i] += info.file_size
+
+    with ThreadPoolExecutor(max_workers=len(buckets)) as pool:
+        results = pool.map(lambda bucket: _extract_bucket(zip_path, bucket, progress), buckets)
+        return [failure for failures in results for failure in failures]
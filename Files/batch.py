@@ -0,0 +1,156 @@
+import io
+import sys
+import json
+import contextlib
+from jobs import _OutputRouter
+
+# Exit codes for -c/--script runs
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+def read_script(path):
+    """Return the command lines of a script file ('-' for stdin), skipping blanks and # comments"""
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    return [line for line in lines if not line.strip().startswith('#')]
+
+def entry_record(entry):
+    """Describe an Entry as a JSON-serialisable dict"""
+    record = {'name': entry.name, 'path': entry.path, 'type': 'dir' if entry.is_dir else 'file'}
+    try:
+        record['size'] = entry.size
+        record['mtime'] = entry.stat.st_mtime
+    except OSError:
+        record['size'] = record['mtime'] = None
+    if entry.hits:
+        record['hits'] = [{'line': line, 'offset': offset} for line, offset in entry.hits]
+    return record
+
+def _output_lines(text):
+    # Progress output redraws a line with '\r'; keep only what was left on screen
+    lines = (line.rsplit('\r', 1)[-1].rstrip() for line in text.splitlines())
+    return [line for line in lines if line]
+
+class BatchRunner:
+    """Runs a list of command lines on one FileManager without a prompt.
+
+    In JSON mode every command prints one {"type": "result"} line, preceded by
+    one {"type": "entry"} line per record when the command (or the last stage
+    of its pipe) produces entries, so scripts never have to parse the text.
+    """
+
+    def __init__(self, file_manager, aliases, dispatch, json_output=False, keep_going=False):
+        self.file_manager = file_manager
+        self.aliases = aliases
+        self.dispatch = dispatch
+        self.json_output = json_output
+        self.keep_going = keep_going
+        self.failed = 0
+
+    def emit(self, record):
+        sys.stdout.write(json.dumps(record) + '\n')
+
+    def run(self, commands):
+        for command in commands:
+            command = command.strip()
+            if not command:
+                continue
+            if command.lower() == "exit":
+                break
+            ok = self.run_json(command) if self.json_output else self.run_text(command)
+            if not ok:
+                self.failed += 1
+                if not self.keep_going:
+                    break
+        self.wait_for_jobs()
+        return EXIT_FAILED if self.failed else EXIT_OK
+
+    def run_text(self, command):
+        return self.dispatch(self.file_manager, command, self.aliases) is None
+
+    def _record_stages(self, command):
+        """Return the stages of command if its output is a stream of entries, else None"""
+        if command.endswith('&') or command.lower() == "help":
+            return None
+        stages = [self.aliases.get(stage.strip(), stage.strip()) for stage in command.split('|')]
+        for stage in stages:
+            name = stage.split(maxsplit=1)[0].lower() if stage else ""
+            if name not in self.file_manager.pipeline_stages:
+                return None
+        return stages
+
+    def run_json(self, command):
+        fm = self.file_manager
+        error = None
+        stages = self._record_stages(command)
+        entries = 0
+        out = sys.stdout
+        measured = len(fm.metrics.history)
+        captured = io.StringIO()
+        # Background jobs keep writing to their own buffers while output is captured
+        with contextlib.redirect_stdout(_OutputRouter(captured)):
+            if stages is None:
+                error = self.dispatch(fm, command, self.aliases)
+            else:
+                with fm.metrics.measure(command):
+                    try:
+                        records = None
+                        for stage in stages:
+                            parts = stage.split(maxsplit=1)
+                            records = fm.pipeline_stages[parts[0].lower()](parts[1] if len(parts) > 1 else "", records)
+                        for entry in records:
+                            out.write(json.dumps({'type': 'entry', 'command': command, 'entry': entry_record(entry)}) + '\n')
+                            entries += 1
+                    except Exception as e:
+                        error = str(e) or e.__class__.__name__
+        record = {
+            'type': 'result',
+            'command': command,
+            'ok': error is None,
+            'error': error,
+            'output': _output_lines(captured.getvalue()),
+        }
+        if stages is not None:
+            record['entries'] = entries
+        if len(fm.metrics.history) != measured:
+            record['wall_s'] = round(fm.metrics.history[-1].wall_time, 6)
+        self.emit(record)
+        return record['ok']
+
+    def wait_for_jobs(self):
+        """Let background jobs started with '&' finish before exiting"""
+        for job in list(self.file_manager.jobs.jobs.values()):
+            try:
+                job.future.result()
+            except Exception:
+                pass
+            if job.status == "failed":
+                self.failed += 1
+            # Skip whatever 'fg' already streamed to the terminal
+            output, _ = job.read_output(job.shown)
+            if self.json_output:
+                self.emit({'type': 'job', 'id': job.id, 'command': job.command, 'status': job.status,
+                           'output': _output_lines(output)})
+            elif not job.reported:
+                print(output, end='')
+                print(f"[{job.id}] {job.status} in {job.elapsed():.1f}s")
+
+def run_batch(file_manager, commands, aliases, dispatch, json_output=False, keep_going=False):
+    """Run commands without banner or prompt and return the process exit code"""
+    runner = BatchRunner(file_manager, aliases, dispatch, json_output, keep_going)
+    try:
+        code = runner.run(commands)
+    except KeyboardInterrupt:
+        code = EXIT_INTERRUPTED
+    finally:
+        if json_output:
+            # Keep stdout pure JSON lines
+            with contextlib.redirect_stdout(io.StringIO()):
+                file_manager.close()
+        else:
+            file_manager.close()
+    return code
@@ -0,0 +1,138 @@
+import os
+import stat
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 4 * 1024 * 1024
+# Manifest tags, as written by 'sha256sum --tag' and friends
+TAGS = {
+    'md5': 'MD5', 'sha1': 'SHA1', 'sha256': 'SHA256', 'sha512': 'SHA512',
+    'blake2b': 'BLAKE2b', 'blake2s': 'BLAKE2s', 'xxh64': 'XXH64', 'xxh3': 'XXH3',
+}
+ALGORITHMS = {tag.lower(): algo for algo, tag in TAGS.items()}
+
+def new_hash(algo):
+    """Return a hashlib-style object for algo; the xxh* ones need the xxhash package"""
+    if algo in ('xxh64', 'xxh3'):
+        try:
+            import xxhash
+        except ImportError:
+            raise ValueError(f"'{algo}' needs the xxhash package (pip install xxhash)")
+        return xxhash.xxh64() if algo == 'xxh64' else xxhash.xxh3_64()
+    if algo not in TAGS:
+        raise ValueError(f"Unknown algorithm '{algo}'. Use one of: {', '.join(TAGS)}")
+    return hashlib.new(algo)
+
+def hash_file(path, algo, progress=None):
+    """Hash a whole file in large chunks; hashlib drops the GIL while it works, so threads scale"""
+    digest = new_hash(algo)
+    buf = bytearray(CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(path, 'rb') as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+            if progress:
+                progress.update(n)
+    return digest.hexdigest()
+
+def cached_hash(path, st, algo, cache=None, progress=None, compute=None):
+    """Hash path unless the cache has a digest for its (inode, size, mtime).
+
+    compute(path, st), when given, produces the digest instead of hashing the
+    whole file, and algo only names it in the cache.
+    """
+    digest = cache.get(st, algo) if cache else None
+    if digest is not None:
+        if progress:
+            progress.update(st.st_size)
+        return digest
+    digest = compute(path, st) if compute else hash_file(path, algo, progress)
+    if cache:
+        cache.put(st, algo, digest)
+    return digest
+
+def hash_files(files, algo, workers=4, cache=None, progress=None, compute=None):
+    """Hash (path, stat) pairs on a pool and return [(path, digest or OSError)] in input order.
+
+    Files are started largest-first so a big file does not end up trailing on
+    one worker while the others sit idle.
+    """
+    def digest(item):
+        path, st = item
+        try:
+            return cached_hash(path, st, algo, cache, progress, compute)
+        except OSError as e:
+            return e
+
+    order = sorted(range(len(files)), key=lambda i: files[i][1].st_size, reverse=True)
+    results = [None] * len(files)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for i, value in zip(order, pool.map(digest, [files[i] for i in order])):
+            results[i] = value
+    return [(path, value) for (path, _), value in zip(files, results)]
+
+def format_line(algo, name, digest):
+    return f"{TAGS[algo]} ({name}) = {digest}\n"
+
+def read_manifest(path):
+    """Return (algo, relative name, digest) for each line of a tagged manifest"""
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            tag, _, rest = line.partition(' (')
+            name, sep, digest = rest.rpartition(') = ')
+            algo = ALGORITHMS.get(tag.lower())
+            if algo is None or not sep or not digest:
+                raise ValueError(f"{os.path.basename(path)}:{number}: not a checksum line")
+            entries.append((algo, name, digest.strip().lower()))
+    return entries
+
+def resolve_entries(root, entries):
+    """Stat the files a manifest names below root.
+
+    Returns ([(name, path, stat, algo, digest)], [(name, problem)]) where the
+    second list holds names that are missing, not regular files, or that would
+    lead outside root (absolute paths or '..' components).
+    """
+    found = []
+    problems = []
+    top = os.path.join(os.path.abspath(root), '')
+    for algo, name, digest in entries:
+        path = os.path.normpath(os.path.join(top, *name.split('/')))
+        if os.path.isabs(name) or not path.startswith(top):
+            problems.append((name, "outside the tree"))
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            problems.append((name, "missing"))
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            problems.append((name, "not a file"))
+            continue
+        found.append((name, path, st, algo, digest))
+    return found, problems
+
+def verify_entries(found, workers=4, cache=None, progress=None):
+    """Re-hash resolved manifest entries on a pool; return [(name, problem)] for those that differ.
+
+    Digests come from the cache when a file's inode, size and mtime are
+    unchanged, so verifying an untouched tree again reads nothing.
+    """
+    def check(item):
+        name, path, st, algo, expected = item
+        try:
+            actual = cached_hash(path, st, algo, cache, progress)
+        except OSError as e:
+            return name, e.strerror or str(e)
+        return None if actual == expected else (name, "checksum mismatch")
+
+    found = sorted(found, key=lambda item: item[2].st_size, reverse=True)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return sorted(problem for problem in pool.map(check, found) if problem)
@@ -0,0 +1,110 @@
+import os
+import bisect
+import threading
+from collections import OrderedDict
+
+class Completer:
+    """Prefix completion of command names and paths.
+
+    Each directory's names are kept as a sorted, case-folded list built from a
+    single scandir, so a prefix query is a bisect plus a short slice instead of
+    a listdir and a lowercase of every name. An index is rebuilt only when the
+    directory's mtime changes; the least recently used directories are dropped
+    once max_dirs are cached.
+    """
+
+    def __init__(self, commands, max_dirs=64):
+        self.commands = sorted(commands)
+        self.max_dirs = max_dirs
+        self._dirs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _index(self, dir_path):
+        """Return (folded keys, display names) for dir_path, rebuilding it if it changed"""
+        mtime_ns = os.stat(dir_path).st_mtime_ns
+        with self._lock:
+            cached = self._dirs.get(dir_path)
+            if cached is not None and cached[0] == mtime_ns:
+                self._dirs.move_to_end(dir_path)
+                return cached[1], cached[2]
+
+        names = []
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                names.append((entry.name.casefold(), entry.name + os.sep if is_dir else entry.name))
+        names.sort()
+        keys = [key for key, _ in names]
+        display = [name for _, name in names]
+
+        with self._lock:
+            self._dirs[dir_path] = (mtime_ns, keys, display)
+            self._dirs.move_to_end(dir_path)
+            while len(self._dirs) > self.max_dirs:
+                self._dirs.popitem(last=False)
+        return keys, display
+
+    def complete_command(self, prefix):
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.commands, prefix)
+        matches = []
+        for cmd in self.commands[start:]:
+            if not cmd.startswith(prefix):
+                break
+            matches.append(cmd)
+        return matches
+
+    def complete_path(self, text, base_path):
+        """Return paths completing text, which may include directories (e.g. a/b/c)"""
+        head, tail = os.path.split(text)
+        dir_path = os.path.join(base_path, os.path.expanduser(head)) if head else base_path
+        try:
+            keys, names = self._index(dir_path)
+        except OSError:
+            return []
+        prefix = tail.casefold()
+        start = bisect.bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and keys[end].startswith(prefix):
+            end += 1
+        if not head:
+            return names[start:end]
+        # Keep the directory part exactly as typed
+        head = head if head.endswith(os.sep) else head + os.sep
+        return [head + name for name in names[start:end]]
+
+    def complete(self, line, base_path):
+        """Complete the last word of line: a command at the start of a pipe stage, else a path"""
+        stage = line.rsplit('|', 1)[-1]
+        words = stage.split()
+        if stage and stage[-1].isspace():
+            words.append("")
+        if len(words) <= 1:
+            return self.complete_command(words[0] if words else "")
+        return self.complete_path(words[-1], base_path)
+
+    def install(self, get_base_path):
+        """Bind Tab to this completer through readline; returns False when readline is unavailable"""
+        try:
+            import readline
+        except ImportError:
+            return False
+        matches = []
+
+        def complete(text, state):
+            if state == 0:
+                line = readline.get_line_buffer()[:readline.get_endidx()]
+                matches[:] = self.complete(line, get_base_path())
+            return matches[state] if state < len(matches) else None
+
+        readline.set_completer(complete)
+        # Only whitespace and pipes end a word, so a whole path is completed at once
+        readline.set_completer_delims(' \t|')
+        if 'libedit' in (readline.__doc__ or ''):
+            readline.parse_and_bind('bind ^I rl_complete')
+        else:
+            readline.parse_and_bind('tab: complete')
+        return True
@@ -1,26 +1,80 @@
 import configparser
 import os
 
-def load_config():
-    """Load configuration settings from config.ini"""
+def find_config(path=None):
+    """Return the config file to read: path if given, else ./config.ini, else the bundled one"""
+    if path:
+        return path
+    for candidate in ('config.ini', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+def load_config(path=None):
+    """Load configuration settings from config.ini.
+
+    Nothing is written: a missing file just means the defaults apply, so
+    running from a cron job or script never drops a config.ini into the cwd.
+    """
     config = configparser.ConfigParser()
     defaults = {
         'use_colors': 'true',
         'history_size': '10',
-        'aliases': 'ls=dir, rm=del'  # Example aliases
+        'aliases': 'ls=dir, rm=del',  # Example aliases
+        'size_cache_file': '',  # Empty keeps the directory size cache in memory only
+        'size_cache_entries': '100000',
+        'search_workers': '0',  # 0 uses one worker per CPU
+        'search_executor': 'thread',  # thread or process
+        'index_file': '~/.files_index.db',
+        'copy_buffer_size': '1MB',  # Buffer for copies the kernel cannot do directly
+        'transfer_workers': '4',
+        'compress_level': '6',  # 1 (fastest) to 9 (smallest)
+        'compress_workers': '0',  # 0 uses one worker per CPU
+        'delete_workers': '8',
+        'du_workers': '8',
+        'hash_workers': '4',
+        'hash_cache_file': '',  # Empty keeps file hashes in memory only
+        'hash_cache_entries': '100000',
+        'checksum_algo': 'sha256',  # Used by checksum and --verify: sha256, sha1, md5, sha512, blake2b, blake2s, xxh64, xxh3
+        'job_limit': '2',  # Background jobs allowed to run at once
+        'metrics_file': '',  # Append per-command metrics here as JSON lines; empty disables
+        'profile_top': '20',  # Functions listed after each command while 'profile on'
+        'find_workers': '8',
+        'find_prune': '',  # Comma-separated directory globs 'find' never enters, e.g. .git, node_modules
+        'watch_interval': '1.0'  # Seconds between checks when polling (and between cancellation checks)
     }
 
-    if not os.path.exists('config.ini'):
-        config['Settings'] = defaults
-        with open('config.ini', 'w') as configfile:
-            config.write(configfile)
-    else:
-        config.read('config.ini')
+    config['Settings'] = defaults
+    path = find_config(path)
+    if path:
+        if not config.read(path):
+            raise FileNotFoundError(f"Config file not found: {path}")
 
     settings = {
         'use_colors': config.getboolean('Settings', 'use_colors', fallback=True),
         'history_size': config.getint('Settings', 'history_size', fallback=10),
-        'aliases': {}
+        'aliases': {},
+        'size_cache_file': config.get('Settings', 'size_cache_file', fallback=''),
+        'size_cache_entries': config.getint('Settings', 'size_cache_entries', fallback=100000),
+        'search_workers': config.getint('Settings', 'search_workers', fallback=0),
+        'search_executor': config.get('Settings', 'search_executor', fallback='thread'),
+        'index_file': config.get('Settings', 'index_file', fallback='~/.files_index.db'),
+        'copy_buffer_size': config.get('Settings', 'copy_buffer_size', fallback='1MB'),
+        'transfer_workers': config.getint('Settings', 'transfer_workers', fallback=4),
+        'compress_level': config.getint('Settings', 'compress_level', fallback=6),
+        'compress_workers': config.getint('Settings', 'compress_workers', fallback=0),
+        'delete_workers': config.getint('Settings', 'delete_workers', fallback=8),
+        'du_workers': config.getint('Settings', 'du_workers', fallback=8),
+        'hash_workers': config.getint('Settings', 'hash_workers', fallback=4),
+        'hash_cache_file': config.get('Settings', 'hash_cache_file', fallback=''),
+        'hash_cache_entries': config.getint('Settings', 'hash_cache_entries', fallback=100000),
+        'checksum_algo': config.get('Settings', 'checksum_algo', fallback='sha256'),
+        'job_limit': config.getint('Settings', 'job_limit', fallback=2),
+        'metrics_file': config.get('Settings', 'metrics_file', fallback=''),
+        'profile_top': config.getint('Settings', 'profile_top', fallback=20),
+        'find_workers': config.getint('Settings', 'find_workers', fallback=8),
+        'find_prune': config.get('Settings', 'find_prune', fallback=''),
+        'watch_interval': config.getfloat('Settings', 'watch_interval', fallback=1.0)
     }
 
     alias_str = config.get('Settings', 'aliases', fallback='')
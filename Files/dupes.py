@@ -0,0 +1,52 @@
+import hashlib
+from collections import defaultdict
+from checksum import hash_files
+
+# Bytes read from each end of a file for the partial hash
+EDGE_SIZE = 4096
+
+def partial_hash(path, st):
+    """Hash the first and last few KB of a file"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(EDGE_SIZE))
+        if st.st_size > EDGE_SIZE:
+            f.seek(max(EDGE_SIZE, st.st_size - EDGE_SIZE))
+            digest.update(f.read(EDGE_SIZE))
+    return digest.hexdigest()
+
+def _regroup(groups, kind, workers, cache, compute=None):
+    """Split each group of (path, stat) by a digest, keeping groups of two or more.
+
+    Every file of every group goes to the pool in one batch, so a run of small
+    groups does not leave workers waiting on each group's slowest file.
+    """
+    items = [(index, item) for index, group in enumerate(groups) for item in group]
+    results = hash_files([item for _, item in items], kind, workers, cache, compute=compute)
+    by_digest = defaultdict(list)
+    for (index, item), (_, value) in zip(items, results):
+        if not isinstance(value, OSError):
+            by_digest[index, value].append(item)
+    return [group for group in by_digest.values() if len(group) > 1]
+
+def find_duplicates(files, workers=4, cache=None):
+    """Group (path, stat) pairs into lists of files with identical content.
+
+    Files are grouped by size first, then by a hash of their first and last few
+    KB, and only the survivors are fully hashed, so most files are never read in
+    full. Hardlinks to the same inode are treated as one file.
+    """
+    by_size = defaultdict(list)
+    seen = set()
+    for path, st in files:
+        if st.st_size == 0 or (st.st_dev, st.st_ino) in seen:
+            continue
+        seen.add((st.st_dev, st.st_ino))
+        by_size[st.st_size].append((path, st))
+    groups = [group for group in by_size.values() if len(group) > 1]
+
+    groups = _regroup(groups, 'partial', workers, cache, partial_hash)
+    groups = _regroup(groups, 'blake2b', workers, cache)
+    for group in groups:
+        group.sort(key=lambda item: item[0])
+    return sorted(groups, key=lambda group: group[0][1].st_size * (len(group) - 1), reverse=True)
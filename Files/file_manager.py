@@ -1,10 +1,29 @@
 import os
-import shutil
-import datetime
-import time
+import re
+import glob
 import stat
-import zipfile
-from utils import format_size, color_text, COLOR, show_progress
+import fnmatch
+import operator
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils import format_size, format_permissions, parse_size, color_text, COLOR, Progress
+from listing import Entry, scan_directory, walk_entries
+from sizecache import SizeCache
+from search import compile_pattern, search_contents
+from transfer import TransferPlan, run_plan, same_device
+from remove import RemovalStats, remove_paths
+from usage import DiskUsage
+from walker import parallel_walk
+from hashcache import HashCache
+from jobs import JobManager, JobCancelled, check_cancelled
+from metrics import Metrics, count
+from completion import Completer
+from render import Renderer, format_mtime, parse_render_options
+from find import Finder, PathEntry, PREDICATE, find_entries
+
+class CommandError(Exception):
+    """Invalid command usage; the message is shown to the user as-is"""
 
 class FileManager:
     def __init__(self, config):
@@ -13,21 +32,64 @@ class FileManager:
         self.commands = [
             "dir", "cd", "pwd", "info", "copy", "move", "del", "delmany",
             "mkdir", "rename", "search", "compress", "decompress", "clear",
-            "history", "interactive", "exit"
+            "history", "interactive", "index", "find", "watch", "where", "head", "du", "dupes", "sync", "checksum", "verify", "jobs", "fg", "cancel", "stats", "profile", "exit"
         ]
+        # Commands that can feed records into the next stage of a pipe
+        self.pipeline_stages = {
+            "dir": self._dir_records,
+            "search": self._search_records,
+            "find": self._find_records,
+            "where": self._where_records,
+            "head": self._head_records,
+            "du": self._du_records,
+            "dupes": self._dupes_records,
+        }
+        self.size_cache = SizeCache(config.get('size_cache_entries', 100000), config.get('size_cache_file'))
+        self._file_index = None
+        self.buffer_size = parse_size(config.get('copy_buffer_size') or '1MB')
+        self.hash_cache = HashCache(config.get('hash_cache_entries', 100000), config.get('hash_cache_file'))
+        self.jobs = JobManager(config.get('job_limit', 2))
+        self.metrics = Metrics(export_path=config.get('metrics_file') or None,
+                               profile_top=config.get('profile_top', 20))
+        self.completer = Completer(self.commands + ["help"])
+
+    def close(self):
+        if self.jobs.running():
+            print(f"Cancelling {len(self.jobs.running())} background job(s)...")
+        self.jobs.shutdown()
+        self.size_cache.save()
+        self.hash_cache.save()
+        if self._file_index is not None:
+            self._file_index.close()
+
+    # Modules behind rarely used commands (sqlite3, zipfile, hashlib) are
+    # imported on first use so one-off and batch invocations start quickly
+
+    @property
+    def file_index(self):
+        if self._file_index is None:
+            from index import FileIndex
+            self._file_index = FileIndex(self.config.get('index_file') or '~/.files_index.db')
+        return self._file_index
 
     def execute_command(self, command, piped_input=None):
+        """Run one command; returns its error message, or None when it succeeded"""
         parts = command.split(maxsplit=1)
         cmd = parts[0].lower() if parts else ""
-        
+        if cmd in ("stats", "profile"):
+            # Looking at the metrics should not add to them
+            return self._dispatch(cmd, parts, piped_input)
+        with self.metrics.measure(command):
+            return self._dispatch(cmd, parts, piped_input)
+
+    def _dispatch(self, cmd, parts, piped_input):
         try:
             if cmd == "dir":
-                return self.list_directory(parts[1] if len(parts) > 1 else "", piped_input)
+                self.list_directory(parts[1] if len(parts) > 1 else "", piped_input)
             elif cmd == "cd" and len(parts) > 1:
                 self.change_directory(parts[1])
             elif cmd == "pwd":
                 print(self.current_path)
-                return self.current_path
             elif cmd == "info" and len(parts) > 1:
                 self.show_info(parts[1])
             elif cmd == "copy" and len(parts) > 1:
@@ -36,117 +98,461 @@ class FileManager:
                 self.move_item(parts[1])
             elif cmd == "del" and len(parts) > 1:
                 self.delete_item(parts[1])
-            elif cmd == "delmany" and len(parts) > 1:
-                self.delete_multiple(parts[1])
+            elif cmd == "delmany" and (len(parts) > 1 or piped_input is not None):
+                self.delete_multiple(parts[1] if len(parts) > 1 else "", piped_input)
             elif cmd == "mkdir" and len(parts) > 1:
                 self.make_directory(parts[1])
             elif cmd == "rename" and len(parts) > 1:
                 self.rename_item(parts[1])
             elif cmd == "search" and len(parts) > 1:
-                return self.search_files(parts[1], piped_input)
+                self.search_files(parts[1], piped_input)
+            elif cmd == "watch":
+                self.watch_directory(parts[1] if len(parts) > 1 else "")
+            elif cmd == "find":
+                self.find_files(parts[1] if len(parts) > 1 else "", piped_input)
+            elif cmd == "where" and len(parts) > 1:
+                self.render_listing(self._where_records(parts[1], piped_input))
+            elif cmd == "head":
+                self.render_listing(self._head_records(parts[1] if len(parts) > 1 else "", piped_input))
+            elif cmd == "du":
+                self.disk_usage(parts[1] if len(parts) > 1 else "")
+            elif cmd == "sync" and len(parts) > 1:
+                self.sync_dirs(parts[1])
+            elif cmd == "dupes":
+                self.find_dupes(parts[1] if len(parts) > 1 else "")
+            elif cmd == "checksum":
+                self.checksum_files(parts[1] if len(parts) > 1 else "")
+            elif cmd == "verify" and len(parts) > 1:
+                self.verify_manifest(parts[1])
             elif cmd == "compress" and len(parts) > 1:
-                self.compress_item(parts[1])
+                self.compress_item(parts[1], piped_input)
             elif cmd == "decompress" and len(parts) > 1:
                 self.decompress_item(parts[1])
+            elif cmd == "index" and len(parts) > 1:
+                self.manage_index(parts[1])
+            elif cmd == "jobs":
+                self.list_jobs()
+            elif cmd == "fg" and len(parts) > 1:
+                self.foreground_job(parts[1])
+            elif cmd == "cancel" and len(parts) > 1:
+                self.cancel_job(parts[1])
+            elif cmd == "stats":
+                self.show_stats(parts[1] if len(parts) > 1 else "")
+            elif cmd == "profile":
+                self.set_profile(parts[1] if len(parts) > 1 else "")
             elif cmd == "clear":
                 from utils import clear_screen
                 clear_screen()
             else:
-                print("Unknown command. Type 'help' for available commands")
+                return self._fail("Unknown command. Type 'help' for available commands")
+        except CommandError as e:
+            return self._fail(str(e))
+        except JobCancelled as e:
+            return self._fail(str(e), prefix="\n")
         except PermissionError:
-            print("Permission denied. Try running with elevated privileges.")
+            return self._fail("Permission denied. Try running with elevated privileges.")
         except FileNotFoundError:
-            print("File or directory not found.")
+            return self._fail("File or directory not found.")
         except Exception as e:
-            print(f"Unexpected error: {str(e)}")
+            return self._fail(f"Unexpected error: {str(e)}")
         return None
 
-    def get_command_suggestions(self, partial, include_files=False):
-        suggestions = [cmd for cmd in self.commands if cmd.startswith(partial.lower())]
-        if include_files and partial:
+    def _fail(self, message, prefix=""):
+        """Print an error and return it, so batch mode can report the command as failed"""
+        print(f"{prefix}{message}")
+        return message
+
+    def run_pipeline(self, commands):
+        """Run '|'-separated commands, passing Entry records between stages.
+
+        Every stage but the last only builds a lazy iterator over the previous
+        one, so entries stream through without being printed or re-stat'ed; the
+        last command renders the records or consumes them (e.g. delmany).
+        Returns the error message of the stage that failed, or None.
+        """
+        with self.metrics.measure(" | ".join(commands)):
+            return self._run_stages(commands)
+
+    def _run_stages(self, commands):
+        records = None
+        for command in commands[:-1]:
+            parts = command.split(maxsplit=1)
+            stage = self.pipeline_stages.get(parts[0].lower() if parts else "")
+            if stage is None:
+                return self._fail(f"'{command}' cannot feed a pipe. Use one of: {', '.join(self.pipeline_stages)}")
             try:
-                files = [f for f in os.listdir(self.current_path) if f.lower().startswith(partial.lower())]
-                suggestions.extend(files)
-            except Exception:
-                pass
+                records = stage(parts[1] if len(parts) > 1 else "", records)
+            except CommandError as e:
+                return self._fail(str(e))
+        last = commands[-1]
+        if last.lower().startswith("interactive"):
+            self.interactive_mode(last[11:].strip(), records)
+            return None
+        return self.execute_command(last, records)
+
+    def start_job(self, commands):
+        """Run a command (or pipeline) on the background job executor"""
+        if commands[-1].lower().startswith("interactive"):
+            print("Interactive mode cannot run in the background")
+            return None
+        if len(commands) > 1:
+            job = self.jobs.submit(" | ".join(commands), lambda: self.run_pipeline(commands))
+        else:
+            job = self.jobs.submit(commands[0], lambda: self.execute_command(commands[0]))
+        print(f"[{job.id}] {job.command}")
+        return job
+
+    def _get_job(self, job_id):
+        job = self.jobs.get(int(job_id)) if job_id.strip().isdigit() else None
+        if job is None:
+            raise CommandError(f"No such job: {job_id}")
+        return job
+
+    def list_jobs(self):
+        if not self.jobs.jobs:
+            print("No jobs")
+            return
+        for job in self.jobs.jobs.values():
+            print(f"[{job.id}] {job.status:<10} {job.elapsed():>7.1f}s  {job.command}"
+                  + (f"  ({job.progress})" if job.progress else ""))
+
+    def foreground_job(self, job_id):
+        job = self._get_job(job_id)
+        position = 0
+        try:
+            while True:
+                finished = job.done()
+                text, position = job.read_output(position)
+                if text:
+                    print(text, end='', flush=True)
+                job.shown = max(job.shown, position)
+                if finished:
+                    break
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print(f"\n[{job.id}] still running in the background")
+            return
+        job.reported = True
+        print(f"[{job.id}] {job.status} in {job.elapsed():.1f}s")
+
+    def cancel_job(self, job_id):
+        job = self._get_job(job_id)
+        if job.done():
+            print(f"[{job.id}] already {job.status}")
+            return
+        job.cancel()
+        print(f"[{job.id}] cancellation requested")
+
+    def show_stats(self, args):
+        """Show session metrics: totals per command, the last N commands, or export/reset them"""
+        parts = args.split()
+        action = parts[0].lower() if parts else ""
+        if action == "reset":
+            self.metrics.reset()
+            print("Metrics cleared")
+            return
+        if action == "export":
+            if len(parts) < 2:
+                raise CommandError("Usage: stats export <file.jsonl>")
+            path = os.path.join(self.current_path, parts[1])
+            written = self.metrics.export(path)
+            print(f"Appended {written} command record(s) to {path}")
+            return
+        if action == "last":
+            count = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 10
+            records = list(self.metrics.history)[-count:]
+            if not records:
+                print("No commands measured yet")
+                return
+            print(f"{'Wall':>9} {'Entries':>9} {'Stats':>9} {'Read':>10} {'Written':>10} {'Print':>8}  Command")
+            for record in records:
+                print(f"{record.wall_time:>8.3f}s {record.entries:>9} {record.stat_calls:>9} "
+                      f"{self._io_size(record.read_bytes):>10} {self._io_size(record.write_bytes):>10} "
+                      f"{record.print_time:>7.3f}s  {record.command}")
+            return
+        if action:
+            raise CommandError("Usage: stats [last [N]|reset|export <file.jsonl>]")
+
+        if not self.metrics.totals:
+            print("No commands measured yet")
+            return
+        print(f"{'Command':<12} {'Runs':>5} {'Total':>9} {'Avg':>9} {'Entries':>9} {'Stats':>9} "
+              f"{'Read':>10} {'Written':>10} {'Print':>8}")
+        for name, (runs, wall, entries, stat_calls, read, written, printing) in sorted(
+                self.metrics.totals.items(), key=lambda item: item[1][1], reverse=True):
+            print(f"{name:<12} {runs:>5} {wall:>8.3f}s {wall / runs:>8.3f}s {entries:>9} {stat_calls:>9} "
+                  f"{format_size(read):>10} {format_size(written):>10} {printing:>7.3f}s")
+        if self.metrics.profiling:
+            print("\nProfiling is on")
+
+    def _io_size(self, value):
+        return "n/a" if value is None else format_size(value)
+
+    def set_profile(self, args):
+        """Turn cProfile on or off for foreground commands"""
+        parts = args.split()
+        if not parts:
+            print(f"Profiling is {'on' if self.metrics.profiling else 'off'}")
+            return
+        if parts[0].lower() == "on":
+            if len(parts) > 1:
+                if not parts[1].isdigit():
+                    raise CommandError("Usage: profile on [N]")
+                self.metrics.profile_top = int(parts[1])
+            self.metrics.profiling = True
+            print(f"Profiling on: the top {self.metrics.profile_top} functions by cumulative time "
+                  "are shown after each command")
+        elif parts[0].lower() == "off":
+            self.metrics.profiling = False
+            print("Profiling off")
+        else:
+            raise CommandError("Usage: profile on [N]|off")
+
+    def get_command_suggestions(self, partial, include_files=False):
+        """Complete the last word of partial: command names, and paths when include_files is set"""
+        if not include_files:
+            return self.completer.complete_command(partial)
+        suggestions = self.completer.complete(partial, self.current_path)
+        word = partial.rsplit('|', 1)[-1].lstrip()
+        if word and not any(c.isspace() for c in word):
+            # A lone word may also be a name in the current directory
+            suggestions += self.completer.complete_path(word, self.current_path)
         return suggestions
 
     def get_dir_size(self, path):
-        total = 0
-        for dirpath, _, filenames in os.walk(path):
-            for filename in filenames:
-                total += os.path.getsize(os.path.join(dirpath, filename))
-        return total
+        return self.size_cache.get_size(path)
 
     def get_permissions(self, path):
-        st = os.stat(path)
-        mode = st.st_mode
-        perms = ''
-        perms += 'r' if mode & stat.S_IRUSR else '-'
-        perms += 'w' if mode & stat.S_IWUSR else '-'
-        perms += 'x' if mode & stat.S_IXUSR else '-'
-        perms += 'r' if mode & stat.S_IRGRP else '-'
-        perms += 'w' if mode & stat.S_IWGRP else '-'
-        perms += 'x' if mode & stat.S_IXGRP else '-'
-        perms += 'r' if mode & stat.S_IROTH else '-'
-        perms += 'w' if mode & stat.S_IWOTH else '-'
-        perms += 'x' if mode & stat.S_IXOTH else '-'
-        return perms
+        return format_permissions(os.stat(path).st_mode)
 
     def list_directory(self, args, piped_input=None):
+        args, limit, page = self._render_options(args)
+        entries = self._dir_records(args, piped_input)
+        if piped_input is None:
+            first = next(entries, None)
+            if first is None:
+                if "type:" not in args:
+                    print("Directory is empty")
+                    return
+                entries = iter(())
+            else:
+                entries = itertools.chain([first], entries)
+        self.render_listing(entries, limit, page)
+
+    def _render_options(self, args):
+        try:
+            return parse_render_options(args)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def _dir_records(self, args, records=None):
         sort_key = None
         type_filter = None
-        args_parts = args.split()
-        for arg in args_parts:
+        deep_sizes = False
+        for arg in args.split():
             if arg.startswith("sort:"):
                 sort_type = arg.split("sort:")[1].lower()
                 sort_key = "size" if sort_type == "size" else "name" if sort_type == "name" else None
             elif arg.startswith("type:"):
                 type_filter = arg.split("type:")[1].lower()
                 if type_filter not in ["file", "dir"]:
-                    print("Invalid type filter. Use 'file' or 'dir'.")
-                    return
+                    raise CommandError("Invalid type filter. Use 'file' or 'dir'.")
+            elif arg.startswith("size:"):
+                if arg.split("size:")[1].lower() != "deep":
+                    raise CommandError("Invalid size mode. Use 'size:deep'.")
+                deep_sizes = True
 
-        items = os.listdir(self.current_path) if not piped_input else piped_input.splitlines()
-        if not items:
-            print("Directory is empty")
-            return
-            
-        print(f"\nDirectory: {self.current_path}")
-        headers = f"{'Type':<6} {'Size':>10} {'Modified':>20} {'Perms':<10} {'Name'}"
-        print(color_text(headers, COLOR.CYAN) if self.config['use_colors'] else headers)
-        print(color_text("-" * 70, COLOR.GRAY) if self.config['use_colors'] else "-" * 70)
-        
-        item_list = []
-        for item in items:
-            item = item.strip().split()[-1] if piped_input else item
-            full_path = os.path.join(self.current_path, item)
-            if not os.path.exists(full_path):
-                continue
-            stats = os.stat(full_path)
-            item_type = "DIR" if os.path.isdir(full_path) else "FILE"
-            if type_filter and item_type.lower() != type_filter:
-                continue
-            size = self.get_dir_size(full_path) if item_type == "DIR" else stats.st_size
-            item_list.append((item, full_path, stats, size))
+        entries = records if records is not None else scan_directory(self.current_path)
+        if type_filter:
+            entries = (entry for entry in entries if entry.is_dir == (type_filter == "dir"))
+        if not deep_sizes and sort_key is None:
+            return iter(entries)
 
+        entries = list(entries)
+        # Directory sizes need a full walk, so only compute them on request
+        # (sorting by size implies it) and spread the walks over a pool
+        if deep_sizes or sort_key == "size":
+            dirs = [entry for entry in entries if entry.is_dir and entry.size is None]
+            if dirs:
+                with ThreadPoolExecutor() as pool:
+                    for entry, size in zip(dirs, pool.map(self.get_dir_size, [entry.path for entry in dirs])):
+                        entry.size = size
         if sort_key == "size":
-            item_list.sort(key=lambda x: x[3], reverse=True)
+            entries.sort(key=lambda entry: entry.size or 0, reverse=True)
         elif sort_key == "name":
-            item_list.sort(key=lambda x: x[0].lower())
-
-        output = []
-        for item, full_path, stats, size in item_list:
-            item_type = "DIR" if os.path.isdir(full_path) else "FILE"
-            color = COLOR.BLUE if item_type == "DIR" else COLOR.GREEN
-            size_str = format_size(size)
-            mod_time = datetime.datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M')
-            perms = self.get_permissions(full_path)
-            line = f"{item_type:<6} {size_str:>10} {mod_time:>20} {perms:<10} {item}"
-            print(color_text(line, color) if self.config['use_colors'] else line)
-            output.append(line)
-        print(f"\n{len(item_list)} item(s)")
-        return '\n'.join(output) if output else None
+            entries.sort(key=lambda entry: entry.name.lower())
+        return iter(entries)
+
+    def find_files(self, args, piped_input=None):
+        args, limit, page = self._render_options(args)
+        errors = []
+        self.render_listing(self._find_records(args, piped_input, errors), limit, page)
+        for dir_path, error in errors:
+            print(f"Skipped {os.path.relpath(dir_path, self.current_path)}: {error.strerror}")
+
+    def _find_records(self, args, records=None, errors=None):
+        """Stream entries under a path (or from a pipe) that match find predicates"""
+        args, workers = self._parse_jobs(args, self.config.get('find_workers', 8))
+        root = self.current_path
+        predicates = []
+        for arg in args.split():
+            if PREDICATE.match(arg):
+                predicates.append(arg)
+            elif records is None and root == self.current_path and not re.match(r"^\w+(>|<|!=|=|~|&)", arg):
+                root = os.path.abspath(os.path.join(self.current_path, arg))
+            else:
+                raise CommandError(f"Invalid predicate '{arg}'. Use e.g. size>100MB, age>30d, type=file, "
+                                   "ext=log, name=*.tmp, perm=644, depth<=2, prune=.git")
+        predicates += [f"prune={pattern.strip()}" for pattern in self.config.get('find_prune', '').split(',')
+                       if pattern.strip()]
+        try:
+            finder = Finder(predicates)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if records is not None:
+            return (entry for entry in self._cancellable(records)
+                    if finder.matches(PathEntry(entry.path),
+                                      os.path.relpath(entry.path, self.current_path).count(os.sep) + 1))
+        if not os.path.isdir(root):
+            raise CommandError("Invalid directory")
+        return (Entry(dir_entry.path, os.path.relpath(dir_entry.path, self.current_path), dir_entry=dir_entry)
+                for dir_entry, _ in self._cancellable(find_entries(root, finder, workers, errors)))
+
+    def _where_records(self, args, records=None):
+        conditions = []
+        for condition in args.split():
+            match = re.match(r"^(size|type|name|ext)(>=|<=|!=|=|>|<|~)(.+)$", condition)
+            if not match:
+                raise CommandError(f"Invalid condition '{condition}'. Use e.g. size>1MB, type=dir, name~log, ext=py.")
+            field, op, value = match.groups()
+            conditions.append(self._compile_condition(field, op, value))
+        entries = records if records is not None else scan_directory(self.current_path)
+        return (entry for entry in entries if all(condition(entry) for condition in conditions))
+
+    def _compile_condition(self, field, op, value):
+        if field == "size":
+            try:
+                limit = parse_size(value)
+            except ValueError:
+                raise CommandError(f"Invalid size '{value}'")
+            compare = {">": operator.gt, "<": operator.lt, ">=": operator.ge, "<=": operator.le,
+                       "=": operator.eq, "!=": operator.ne}.get(op)
+            if compare is None:
+                raise CommandError("Size conditions use >, <, >=, <=, = or !=")
+            return lambda entry: entry.size is not None and compare(entry.size, limit)
+        if op not in ("=", "!=", "~"):
+            raise CommandError(f"'{field}' conditions use =, != or ~")
+        if field == "type":
+            if value not in ("file", "dir"):
+                raise CommandError("Invalid type. Use 'file' or 'dir'.")
+            wanted = value == "dir"
+            return lambda entry: (entry.is_dir == wanted) != (op == "!=")
+        if field == "ext":
+            suffix = "." + value.lower().lstrip(".")
+            return lambda entry: entry.name.lower().endswith(suffix) != (op == "!=")
+        value = value.lower()
+        if op == "~":
+            return lambda entry: value in os.path.basename(entry.name).lower()
+        return lambda entry: fnmatch.fnmatch(os.path.basename(entry.name).lower(), value) != (op == "!=")
+
+    def _head_records(self, args, records=None):
+        count = args.strip() or "10"
+        if not count.isdigit():
+            raise CommandError("Invalid count. Use 'head N'.")
+        entries = records if records is not None else scan_directory(self.current_path)
+        return itertools.islice(entries, int(count))
+
+    def render_listing(self, entries, limit=None, page=False, path=None):
+        out = Renderer(self.config['use_colors'], limit, page)
+        out.line(f"\nDirectory: {path or self.current_path}")
+        out.line(f"{'Type':<6} {'Size':>10} {'Modified':>20} {'Perms':<10} {'Name'}", COLOR.CYAN)
+        out.line("-" * 70, COLOR.GRAY)
+
+        entries = iter(entries)
+        for entry in entries:
+            try:
+                line = self._listing_row(entry)
+            except OSError:
+                # Broken symlinks and entries removed since they were listed
+                continue
+            if not out.row(line, COLOR.BLUE if entry.is_dir else COLOR.GREEN):
+                break
+        # Entries past the limit are never stat'ed or formatted
+        if out.truncated() and next(entries, None) is not None:
+            out.line(f"\nShowing the first {out.rows} item(s)")
+        else:
+            out.line(f"\n{out.rows} item(s)")
+        out.flush()
+
+    def _listing_row(self, entry):
+        stats = entry.stat
+        item_type = "DIR" if entry.is_dir else "FILE"
+        size_str = format_size(entry.size) if entry.size is not None else "-"
+        return (f"{item_type:<6} {size_str:>10} {format_mtime(stats.st_mtime):>20} "
+                f"{format_permissions(stats.st_mode):<10} {entry.name}")
+
+    def watch_directory(self, args):
+        """List a directory, then print only the rows that change until interrupted"""
+        from watch import WatchedDirectory, InotifyWatcher, WatchGone, RESCAN, open_watcher
+        path = self.current_path
+        type_filter = None
+        deep_sizes = False
+        poll = False
+        interval = self.config.get('watch_interval', 1.0)
+        options = iter(args.split())
+        for option in options:
+            if option.startswith("type:"):
+                type_filter = option.split("type:")[1].lower()
+                if type_filter not in ("file", "dir"):
+                    raise CommandError("Invalid type filter. Use 'file' or 'dir'.")
+            elif option == "size:deep":
+                deep_sizes = True
+            elif option == "--poll":
+                poll = True
+            elif option == "--interval":
+                try:
+                    interval = float(next(options, ""))
+                except ValueError:
+                    raise CommandError("Invalid interval. Use '--interval SECONDS'.")
+                if interval <= 0:
+                    raise CommandError("Invalid interval. Use '--interval SECONDS'.")
+            else:
+                path = os.path.abspath(os.path.join(self.current_path, option))
+        if not os.path.isdir(path):
+            raise CommandError("Invalid directory")
+
+        state = WatchedDirectory(path, type_filter, self.get_dir_size if deep_sizes else None)
+        watcher = open_watcher(path, poll)
+        markers = {"added": ("+", COLOR.GREEN), "removed": ("-", COLOR.RED), "changed": ("~", COLOR.YELLOW)}
+        use_colors = Renderer(self.config['use_colors']).use_colors
+        try:
+            state.load()
+            self.render_listing((state.rows[name] for name in sorted(state.rows)), path=state.path)
+            how = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {interval:g}s"
+            print(f"Watching {path} ({how}); press Ctrl-C to stop")
+            while True:
+                check_cancelled()
+                names = watcher.changes(interval)
+                if names is RESCAN:
+                    deltas = state.load()
+                elif names:
+                    deltas = state.apply(names)
+                else:
+                    continue
+                for change, entry in deltas:
+                    marker, color = markers[change]
+                    line = f"{marker} {entry.name}" if change == "removed" else f"{marker} {self._listing_row(entry)}"
+                    print(color_text(line, color) if use_colors else line)
+                if deltas:
+                    print(f"  {state.files} file(s), {state.dirs} director{'y' if state.dirs == 1 else 'ies'}, "
+                          f"{format_size(state.total_size)}", flush=True)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+        except WatchGone:
+            print(f"\n{path} was removed; stopped watching")
+        finally:
+            watcher.close()
 
     def change_directory(self, path):
         if path == "..":
@@ -158,18 +564,18 @@ class FileManager:
             self.current_path = new_path
             print(f"Changed to: {self.current_path}")
         else:
-            print("Invalid directory")
+            raise CommandError("Invalid directory")
 
     def show_info(self, name):
+        import datetime
         full_path = os.path.join(self.current_path, name)
         if not os.path.exists(full_path):
-            print("Item not found")
-            return
+            raise CommandError("Item not found")
             
         stats = os.stat(full_path)
         item_type = "Directory" if os.path.isdir(full_path) else "File"
         size = self.get_dir_size(full_path) if item_type == "Directory" else stats.st_size
-        color = COLOR.YELLOW if self.config['use_colors'] else None
+        color = COLOR.YELLOW if Renderer(self.config['use_colors']).use_colors else None
         
         print(f"\nInfo for: {color_text(name, color) if color else name}")
         print(f"Type: {item_type}")
@@ -179,70 +585,140 @@ class FileManager:
         print(f"Modified: {datetime.datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Path: {full_path}")
 
+    def _parse_jobs(self, args, default):
+        """Strip a '-j N' option from args and return (args, workers)"""
+        parts = args.split()
+        if "-j" not in parts:
+            return args, default
+        i = parts.index("-j")
+        if i + 1 >= len(parts) or not parts[i + 1].isdigit() or int(parts[i + 1]) < 1:
+            raise CommandError("Invalid worker count. Use '-j N' with N >= 1.")
+        return " ".join(parts[:i] + parts[i + 2:]), int(parts[i + 1])
+
+    def _parse_verify(self, args):
+        """Strip a '--verify' flag from args and return (args, algorithm or None)"""
+        parts = args.split()
+        if "--verify" not in parts:
+            return args, None
+        parts.remove("--verify")
+        return " ".join(parts), self.config.get('checksum_algo') or 'sha256'
+
+    def _transfer(self, pairs, workers, move=False, verify=None):
+        """Copy or move (src_path, dst_path) pairs through one plan and worker pool"""
+        resolved = []
+        for src_path, dst_path in pairs:
+            if os.path.isdir(dst_path) and (move or not os.path.isdir(src_path)):
+                dst_path = os.path.join(dst_path, os.path.basename(src_path))
+            # Checked before anything is written, since copying onto the source destroys it
+            src_real = os.path.realpath(src_path)
+            dst_real = os.path.realpath(dst_path)
+            name = os.path.relpath(src_path, self.current_path)
+            if dst_real == src_real:
+                raise CommandError(f"Cannot {'move' if move else 'copy'} {name} onto itself")
+            if os.path.isdir(src_path) and dst_real.startswith(src_real.rstrip(os.sep) + os.sep):
+                raise CommandError(f"Cannot {'move' if move else 'copy'} directory {name} into itself")
+            resolved.append((src_path, dst_path))
+
+        plan = TransferPlan()
+        renamed = 0
+        for src_path, dst_path in resolved:
+            if move and same_device(src_path, dst_path):
+                os.rename(src_path, dst_path)
+                renamed += 1
+            else:
+                plan.add(src_path, dst_path)
+
+        failures = []
+        if plan.files or plan.dirs:
+            progress = Progress(plan.total_size)
+            failures = run_plan(plan, workers, progress, self.buffer_size, verify, self.hash_cache)
+            progress.finish()
+        self._report_failures(failures)
+        if move and not failures:
+            for src_path, _ in pairs:
+                if os.path.lexists(src_path):
+                    if os.path.isdir(src_path) and not os.path.islink(src_path):
+                        import shutil
+                        shutil.rmtree(src_path)
+                    else:
+                        os.remove(src_path)
+        elif move and failures:
+            print("Source left in place because some files failed to copy")
+        return len(plan.files), renamed, failures
+
     def copy_item(self, args):
+        args, workers = self._parse_jobs(args, self.config.get('transfer_workers', 4))
+        args, verify = self._parse_verify(args)
         src, dst = args.split(maxsplit=1)
         src_path = os.path.join(self.current_path, src)
         dst_path = os.path.join(self.current_path, dst)
         if not os.path.exists(src_path):
-            print("Source item not found")
-            return
+            raise CommandError("Source item not found")
 
         print(f"Copying {src} to {dst}...")
-        start_time = time.time()
-        if os.path.isdir(src_path):
-            total_size = self.get_dir_size(src_path)
-            shutil.copytree(src_path, dst_path, dirs_exist_ok=True, 
-                          copy_function=lambda src, dst: show_progress(src, dst, total_size, start_time))
-            print(f"\nCopied directory {src} to {dst}")
+        copied, _, failures = self._transfer([(src_path, dst_path)], workers, verify=verify)
+        kind = "directory" if os.path.isdir(src_path) else "file"
+        if failures:
+            raise CommandError(f"Copied {kind} {src} to {dst} with {len(failures)} of {copied} file(s) failed")
         else:
-            total_size = os.path.getsize(src_path)
-            shutil.copy2(src_path, dst_path)
-            show_progress(src_path, dst_path, total_size, start_time, final=True)
-            print(f"Copied file {src} to {dst}")
+            print(f"Copied {kind} {src} to {dst}" + (f" ({copied} file(s) verified with {verify})" if verify else ""))
 
     def move_item(self, args):
+        args, workers = self._parse_jobs(args, self.config.get('transfer_workers', 4))
+        args, verify = self._parse_verify(args)
         src, dst = args.split(maxsplit=1)
         src_path = os.path.join(self.current_path, src)
         dst_path = os.path.join(self.current_path, dst)
         if not os.path.exists(src_path):
-            print("Source item not found")
-            return
+            raise CommandError("Source item not found")
 
         print(f"Moving {src} to {dst}...")
-        start_time = time.time()
-        total_size = self.get_dir_size(src_path) if os.path.isdir(src_path) else os.path.getsize(src_path)
-        shutil.move(src_path, dst_path)
-        show_progress(src_path, dst_path, total_size, start_time, final=True)
-        print(f"Moved {src} to {dst}")
+        _, _, failures = self._transfer([(src_path, dst_path)], workers, move=True, verify=verify)
+        if not failures:
+            print(f"Moved {src} to {dst}")
 
     def delete_item(self, name):
         full_path = os.path.join(self.current_path, name)
-        if not os.path.exists(full_path):
-            print("Item not found")
-            return
-        if os.path.isdir(full_path):
-            shutil.rmtree(full_path)
-            print(f"Deleted directory {name}")
-        else:
-            os.remove(full_path)
-            print(f"Deleted file {name}")
+        try:
+            is_dir = stat.S_ISDIR(os.lstat(full_path).st_mode)
+        except FileNotFoundError:
+            raise CommandError("Item not found")
+        stats = RemovalStats()
+        failures = remove_paths([full_path], self.config.get('delete_workers', 8), stats)
+        self._report_failures(failures)
+        if not failures:
+            print(f"\rDeleted {'directory' if is_dir else 'file'} {name}"
+                  + (f" ({stats.files} files, {stats.rate():.0f} files/s)" if is_dir else ""))
 
-    def delete_multiple(self, args):
-        names = args.split()
-        deleted = 0
+    def delete_multiple(self, args, piped_input=None):
+        names = [os.path.relpath(entry.path, self.current_path) for entry in piped_input or ()]
+        for name in args.split():
+            if glob.has_magic(name):
+                matches = sorted(glob.glob(os.path.join(glob.escape(self.current_path), name)))
+                if not matches:
+                    print(f"Skipped {name} - no matches")
+                names.extend(os.path.relpath(match, self.current_path) for match in matches)
+            else:
+                names.append(name)
+
+        paths = []
         for name in names:
             full_path = os.path.join(self.current_path, name)
-            if os.path.exists(full_path):
-                if os.path.isdir(full_path):
-                    shutil.rmtree(full_path)
-                    print(f"Deleted directory {name}")
-                else:
-                    os.remove(full_path)
-                    print(f"Deleted file {name}")
-                deleted += 1
+            if os.path.lexists(full_path):
+                paths.append(full_path)
             else:
                 print(f"Skipped {name} - not found")
-        print(f"Deleted {deleted} item(s)")
+        stats = RemovalStats()
+        failures = remove_paths(paths, self.config.get('delete_workers', 8), stats)
+        self._report_failures(failures)
+        failed = {path for path, _ in failures}
+        deleted = sum(1 for path in paths if path not in failed)
+        print(f"\rDeleted {deleted} item(s): {stats.files} file(s), {stats.dirs} director{'y' if stats.dirs == 1 else 'ies'} "
+              f"in {time.time() - stats.start_time:.2f}s ({stats.rate():.0f} files/s)")
+
+    def _report_failures(self, failures):
+        for path, error in failures:
+            print(f"\rFailed {os.path.relpath(path, self.current_path)}: {error}")
 
     def make_directory(self, name):
         full_path = os.path.join(self.current_path, name)
@@ -250,7 +726,7 @@ class FileManager:
             os.mkdir(full_path)
             print(f"Created directory: {name}")
         else:
-            print("Directory already exists")
+            raise CommandError("Directory already exists")
 
     def rename_item(self, args):
         old_name, new_name = args.split(maxsplit=1)
@@ -261,117 +737,470 @@ class FileManager:
                 os.rename(old_path, new_path)
                 print(f"Renamed {old_name} to {new_name}")
             else:
-                print("Destination name already exists")
+                raise CommandError("Destination name already exists")
         else:
-            print("Source item not found")
+            raise CommandError("Source item not found")
 
     def search_files(self, args, piped_input=None):
+        args, limit, page = self._render_options(args)
+        entries, description = self._search_records(args, piped_input, describe=True)
+        print(f"\nSearching for {description}...", flush=True)
+        # Content matches come in as files are read, so show each one right away
+        content = "-c" in args.split()[1:]
+        out = Renderer(False, limit, page)
+        for entry in entries:
+            check_cancelled()
+            out.row(f"{'DIR' if entry.is_dir else 'FILE':<6} {entry.name}")
+            for line, offset in entry.hits or ():
+                if line is not None:
+                    out.line(f"       {entry.name}:{line} (offset {offset})")
+            if content:
+                out.flush()
+            if not out.wants_more():
+                # Stop searching once nothing more would be shown
+                break
+        if out.truncated():
+            out.line(f"Stopped after {out.rows} match(es)")
+        else:
+            out.line(f"Found {out.rows} match(es)" if out.rows else "No matches found")
+        out.flush()
+
+    def _search_records(self, args, records=None, describe=False):
         parts = args.split()
+        if not parts:
+            raise CommandError("Usage: search <term> [-r] [-c] [-e] [-w] [-n] [-j N] [--max-size SIZE]")
         term = parts[0]
-        recursive = "-r" in parts[1:] if len(parts) > 1 else False
-        content_search = "-c" in parts[1:] if len(parts) > 1 else False
-        
-        print(f"\nSearching for '{term}' {'recursively' if recursive else 'in current directory'} "
-              f"{'in content' if content_search else 'by name'}...")
-        found = 0
-        output = []
-        
-        if piped_input:
-            items = [(line.split()[-1], os.path.join(self.current_path, line.split()[-1])) 
-                     for line in piped_input.splitlines() if os.path.exists(os.path.join(self.current_path, line.split()[-1]))]
+        recursive = False
+        content_search = False
+        regex = False
+        whole_word = False
+        show_lines = False
+        workers = self.config.get('search_workers') or None
+        max_size = None
+        options = iter(parts[1:])
+        for option in options:
+            if option == "-r":
+                recursive = True
+            elif option == "-c":
+                content_search = True
+            elif option == "-e":
+                regex = True
+            elif option == "-w":
+                whole_word = True
+            elif option == "-n":
+                show_lines = True
+            elif option == "-j":
+                value = next(options, "")
+                if not value.isdigit() or int(value) < 1:
+                    raise CommandError("Invalid worker count. Use '-j N' with N >= 1.")
+                workers = int(value)
+            elif option == "--max-size":
+                try:
+                    max_size = parse_size(next(options, ""))
+                except ValueError:
+                    raise CommandError("Invalid size. Use e.g. '--max-size 100MB'.")
+        try:
+            pattern = compile_pattern(term, regex, whole_word, as_bytes=content_search)
+        except re.error as e:
+            raise CommandError(f"Invalid pattern: {e}")
+
+        index_root = None
+        if recursive and not content_search and records is None:
+            index_root = self.file_index.covering_root(self.current_path)
+
+        if records is not None:
+            entries = records
+        elif index_root:
+            # The index narrows literal terms in SQL; patterns are still applied below
+            entries = (Entry(full_path, os.path.relpath(full_path, self.current_path), is_dir=is_dir)
+                       for full_path, is_dir in self.file_index.search(self.current_path, None if regex or whole_word else term))
+        elif recursive:
+            entries = walk_entries(self.current_path)
         else:
-            items = [(item, os.path.join(self.current_path, item)) for item in os.listdir(self.current_path)] if not recursive else None
-
-        if recursive:
-            for root, dirs, files in os.walk(self.current_path):
-                for item in dirs + files:
-                    full_path = os.path.join(root, item)
-                    if content_search and os.path.isfile(full_path):
-                        try:
-                            with open(full_path, 'r', errors='ignore') as f:
-                                if term.lower() in f.read().lower():
-                                    item_type = "FILE"
-                                    rel_path = os.path.relpath(full_path, self.current_path)
-                                    print(f"{item_type:<6} {rel_path}")
-                                    output.append(f"{item_type:<6} {rel_path}")
-                                    found += 1
-                        except Exception:
-                            continue
-                    elif term.lower() in item.lower():
-                        item_type = "DIR" if os.path.isdir(full_path) else "FILE"
-                        rel_path = os.path.relpath(full_path, self.current_path)
-                        print(f"{item_type:<6} {rel_path}")
-                        output.append(f"{item_type:<6} {rel_path}")
-                        found += 1
+            entries = scan_directory(self.current_path)
+
+        if content_search:
+            matches = search_contents(((entry, entry.path) for entry in entries if not entry.is_dir),
+                                      pattern, workers, max_size, self.config.get('search_executor') == 'process', show_lines)
+            results = (self._with_hits(entry, hits) for entry, hits in matches)
+        else:
+            results = (entry for entry in self._cancellable(entries) if pattern.search(os.path.basename(entry.name)))
+        if not describe:
+            return results
+        description = (f"'{term}' {'recursively' if recursive else 'in current directory'} "
+                       f"{'in content' if content_search else 'by name'}"
+                       f"{f' (index: {index_root})' if index_root else ''}")
+        return results, description
+
+    def _cancellable(self, entries):
+        # Name matching can go a long way between hits, so check on every entry
+        for entry in entries:
+            check_cancelled()
+            yield entry
+
+    def _with_hits(self, entry, hits):
+        entry.hits = hits
+        return entry
+
+    def manage_index(self, args):
+        import datetime
+        parts = args.split(maxsplit=1)
+        action = parts[0].lower()
+        target = os.path.abspath(os.path.join(self.current_path, parts[1])) if len(parts) > 1 else self.current_path
+        if action == "build":
+            print(f"Indexing {target}...")
+            start_time = time.time()
+            checked, rescanned = self.file_index.build(target)
+            print(f"Indexed {checked} director{'y' if checked == 1 else 'ies'} "
+                  f"({rescanned} re-listed) in {time.time() - start_time:.2f}s")
+        elif action == "status":
+            roots = self.file_index.roots()
+            if not roots:
+                print("No index. Use 'index build [path]' to create one.")
+                return
+            print(f"Index file: {self.file_index.path}")
+            for root, built in roots:
+                dirs, entries = self.file_index.stats(root)
+                built_str = datetime.datetime.fromtimestamp(built).strftime('%Y-%m-%d %H:%M:%S')
+                print(f"{root}: {entries} entries in {dirs} directories (updated {built_str})")
+        elif action == "drop":
+            if len(parts) > 1:
+                self.file_index.drop(target)
+                print(f"Dropped index for {target}")
+            else:
+                self.file_index.drop()
+                print("Dropped index")
         else:
-            for item, full_path in items or [(item, os.path.join(self.current_path, item)) for item in os.listdir(self.current_path)]:
-                if content_search and os.path.isfile(full_path):
+            raise CommandError("Invalid index action. Use 'index build|status|drop [path]'.")
+
+    def _scan_usage(self, args):
+        args, workers = self._parse_jobs(args, self.config.get('du_workers', 8))
+        depth = 1
+        top = 10
+        path = self.current_path
+        options = iter(args.split())
+        for option in options:
+            if option in ("--depth", "--top"):
+                value = next(options, "")
+                if not value.isdigit():
+                    raise CommandError(f"Invalid value for {option}. Use a non-negative number.")
+                if option == "--depth":
+                    depth = int(value)
+                else:
+                    top = int(value)
+            else:
+                path = os.path.abspath(os.path.join(self.current_path, option))
+        if not os.path.isdir(path):
+            raise CommandError("Invalid directory")
+        return DiskUsage(path, top).scan(workers), depth
+
+    def _du_records(self, args, records=None):
+        usage, depth = self._scan_usage(args)
+        for dir_path, size, _ in usage.within_depth(depth):
+            entry = Entry(dir_path, os.path.relpath(dir_path, self.current_path), is_dir=True)
+            entry.size = size
+            yield entry
+
+    def disk_usage(self, args):
+        start_time = time.time()
+        usage, depth = self._scan_usage(args)
+        size, files, dirs = usage.total()
+        out = Renderer(self.config['use_colors'])
+        out.line(f"\nDisk usage: {usage.root}")
+        out.line(f"{'Size':>10} {'Files':>10}  {'Directory'}", COLOR.CYAN)
+        for dir_path, dir_size, dir_files in usage.within_depth(depth):
+            out.line(f"{format_size(dir_size):>10} {dir_files:>10}  {os.path.relpath(dir_path, usage.root)}")
+
+        if usage.largest_dirs():
+            out.line("\nLargest directories:")
+            for dir_size, dir_path in usage.largest_dirs():
+                out.line(f"{format_size(dir_size):>10}  {os.path.relpath(dir_path, usage.root)}")
+        if usage.top_files():
+            out.line("\nLargest files:")
+            for file_size, file_path in usage.top_files():
+                out.line(f"{format_size(file_size):>10}  {os.path.relpath(file_path, usage.root)}")
+        for dir_path, error in usage.errors:
+            out.line(f"Skipped {os.path.relpath(dir_path, usage.root)}: {error.strerror}")
+        out.line(f"\nTotal: {format_size(size)} in {files} file(s), {dirs} director{'y' if dirs == 1 else 'ies'} "
+                 f"({time.time() - start_time:.2f}s)")
+        out.flush()
+
+    def _collect_files(self, recursive, workers, root=None):
+        """Return (path, lstat) for regular files in root (the current directory) or below it"""
+        files = []
+
+        def visit(dir_path):
+            found = []
+            subdirs = []
+            with os.scandir(dir_path) as it:
+                for entry in it:
                     try:
-                        with open(full_path, 'r', errors='ignore') as f:
-                            if term.lower() in f.read().lower():
-                                item_type = "FILE"
-                                print(f"{item_type:<6} {item}")
-                                output.append(f"{item_type:<6} {item}")
-                                found += 1
-                    except Exception:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            found.append((entry.path, entry.stat(follow_symlinks=False)))
+                    except OSError:
                         continue
-                elif term.lower() in item.lower():
-                    item_type = "DIR" if os.path.isdir(full_path) else "FILE"
-                    print(f"{item_type:<6} {item}")
-                    output.append(f"{item_type:<6} {item}")
-                    found += 1
-        
-        print(f"Found {found} match(es)" if found else "No matches found")
-        return '\n'.join(output) if output else None
+            count(entries=len(found) + len(subdirs), stats=len(found))
+            files.extend(found)
+            return subdirs if recursive else ()
 
-    def compress_item(self, args):
-        src, zipname = args.split(maxsplit=1)
+        parallel_walk(root or self.current_path, visit, workers if recursive else 1)
+        return files
+
+    def _scan_dupes(self, args):
+        args, workers = self._parse_jobs(args, self.config.get('hash_workers', 4))
+        recursive = "-r" in args.split()
+        from dupes import find_duplicates
+        return find_duplicates(self._collect_files(recursive, workers), workers, self.hash_cache)
+
+    def _dupes_records(self, args, records=None):
+        # Keep the first file of each group and pass the redundant copies on
+        for group in self._scan_dupes(args):
+            for path, st in group[1:]:
+                yield Entry(path, os.path.relpath(path, self.current_path), stats=st, is_dir=False)
+
+    def find_dupes(self, args):
+        start_time = time.time()
+        groups = self._scan_dupes(args)
+        if not groups:
+            print("No duplicates found")
+            return
+        reclaimable = 0
+        for group in groups:
+            size = group[0][1].st_size
+            reclaimable += size * (len(group) - 1)
+            print(f"\n{len(group)} copies of {format_size(size)}:")
+            for path, _ in group:
+                print(f"  {os.path.relpath(path, self.current_path)}")
+        print(f"\n{len(groups)} duplicate group(s), {format_size(reclaimable)} reclaimable "
+              f"({time.time() - start_time:.2f}s)")
+        print("Tip: 'dupes ... | delmany' deletes all but the first file of each group")
+
+    def sync_dirs(self, args):
+        from sync import plan_sync, FAT_MTIME_WINDOW_NS
+        args, workers = self._parse_jobs(args, self.config.get('transfer_workers', 4))
+        options = {"--delete", "--checksum", "--dry-run", "--fat"}
+        flags = {part for part in args.split() if part in options}
+        paths = [part for part in args.split() if part not in options]
+        if len(paths) != 2:
+            raise CommandError("Usage: sync <src> <dst> [--delete] [--checksum] [--dry-run] [--fat] [-j N]")
+        src, dst = paths
         src_path = os.path.join(self.current_path, src)
-        zip_path = os.path.join(self.current_path, zipname if zipname.endswith('.zip') else f"{zipname}.zip")
-        if not os.path.exists(src_path):
-            print("Source item not found")
+        dst_path = os.path.join(self.current_path, dst)
+        if not os.path.isdir(src_path):
+            raise CommandError("Source directory not found")
+
+        start_time = time.time()
+        plan = plan_sync(src_path, dst_path, "--delete" in flags, "--checksum" in flags, workers,
+                         self.hash_cache, FAT_MTIME_WINDOW_NS if "--fat" in flags else 0)
+        summary = (f"{len(plan.new)} new, {len(plan.changed)} changed, {len(plan.delete)} to delete, "
+                   f"{format_size(plan.transfer.total_size)} to copy")
+        if plan.is_empty():
+            print(f"{dst} is up to date ({time.time() - start_time:.2f}s)")
+            return
+        if "--dry-run" in flags:
+            for rel in plan.delete:
+                print(f"- {rel}")
+            for rel in plan.new:
+                print(f"+ {rel}")
+            for rel in plan.changed:
+                print(f"~ {rel}")
+            print(f"Dry run: {summary}")
             return
 
-        print(f"Compressing {src} to {zipname}...")
+        print(f"Syncing {src} to {dst}: {summary}")
+        failures = remove_paths([os.path.join(dst_path, rel) for rel in plan.delete], self.config.get('delete_workers', 8))
+        progress = Progress(plan.transfer.total_size)
+        failures += run_plan(plan.transfer, workers, progress, self.buffer_size)
+        progress.finish()
+        self._report_failures(failures)
+        print(f"Synced {src} to {dst}" + (f" with {len(failures)} failure(s)" if failures else ""))
+
+    def checksum_files(self, args):
+        from checksum import TAGS, new_hash, hash_files, format_line
+        args, workers = self._parse_jobs(args, self.config.get('hash_workers', 4))
+        parts = args.split()
+        algo = self.config.get('checksum_algo') or 'sha256'
+        output = None
+        recursive = False
+        paths = []
+        options = iter(parts)
+        for part in options:
+            if part == "-r":
+                recursive = True
+            elif part == "--algo":
+                algo = next(options, "").lower()
+            elif part == "-o":
+                output = next(options, "")
+                if not output:
+                    raise CommandError("Usage: checksum <path> [-r] [--algo NAME] [-o manifest] [-j N]")
+            else:
+                paths.append(part)
+        if len(paths) > 1:
+            raise CommandError("Usage: checksum <path> [-r] [--algo NAME] [-o manifest] [-j N]")
+        try:
+            new_hash(algo)
+        except ValueError as e:
+            raise CommandError(str(e))
+        target = os.path.join(self.current_path, paths[0] if paths else ".")
+        if not os.path.exists(target):
+            raise CommandError("File or directory not found")
+
         start_time = time.time()
-        total_size = self.get_dir_size(src_path) if os.path.isdir(src_path) else os.path.getsize(src_path)
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-            if os.path.isdir(src_path):
-                for root, _, files in os.walk(src_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        zf.write(file_path, os.path.relpath(file_path, self.current_path))
-                        show_progress(file_path, zip_path, total_size, start_time)
+        output_path = os.path.abspath(os.path.join(self.current_path, output)) if output else None
+        if os.path.isdir(target):
+            root = target
+            files = [item for item in self._collect_files(recursive, workers, target)
+                     if os.path.abspath(item[0]) != output_path]
+        else:
+            root = os.path.dirname(target)
+            files = [(target, os.stat(target))]
+        files.sort(key=lambda item: item[0])
+        # Progress would be mixed into a manifest printed to stdout
+        progress = Progress(sum(st.st_size for _, st in files)) if output else None
+        results = hash_files(files, algo, workers, self.hash_cache, progress)
+        if progress:
+            progress.finish()
+
+        lines = []
+        failed = 0
+        for path, digest in results:
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            if isinstance(digest, OSError):
+                print(f"Failed {name}: {digest.strerror or digest}")
+                failed += 1
             else:
-                zf.write(src_path, os.path.basename(src_path))
-                show_progress(src_path, zip_path, total_size, start_time)
-        show_progress(src_path, zip_path, total_size, start_time, final=True)
-        print(f"\nCompressed {src} to {zipname}")
+                lines.append(format_line(algo, name, digest))
+        if output:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            print(f"Wrote {len(lines)} {TAGS[algo]} checksum(s) to {output} ({time.time() - start_time:.2f}s)")
+        else:
+            renderer = Renderer(use_colors=False)
+            for line in lines:
+                renderer.line(line.rstrip('\n'))
+            renderer.flush()
+        if failed:
+            raise CommandError(f"{failed} file(s) could not be read")
+
+    def verify_manifest(self, args):
+        from checksum import new_hash, read_manifest, resolve_entries, verify_entries
+        args, workers = self._parse_jobs(args, self.config.get('hash_workers', 4))
+        parts = args.split()
+        if len(parts) != 2:
+            raise CommandError("Usage: verify <manifest> <path> [-j N]")
+        manifest_path = os.path.join(self.current_path, parts[0])
+        root = os.path.join(self.current_path, parts[1])
+        if not os.path.isfile(manifest_path):
+            raise CommandError("Manifest not found")
+        if not os.path.isdir(root):
+            raise CommandError("Invalid directory")
+        try:
+            entries = read_manifest(manifest_path)
+            for algo in {algo for algo, _, _ in entries}:
+                new_hash(algo)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        start_time = time.time()
+        found, problems = resolve_entries(root, entries)
+        progress = Progress(sum(item[2].st_size for item in found))
+        problems += verify_entries(found, workers, self.hash_cache, progress)
+        progress.finish()
+        for name, problem in sorted(problems):
+            print(f"FAILED {name}: {problem}")
+        if problems:
+            raise CommandError(f"{len(problems)} of {len(entries)} file(s) failed verification")
+        print(f"Verified {len(entries)} file(s) against {parts[0]} ({time.time() - start_time:.2f}s)")
+
+    def compress_item(self, args, piped_input=None):
+        from archive import collect_members, compress, verify_archive
+        args, workers = self._parse_jobs(args, self.config.get('compress_workers') or None)
+        args, verify = self._parse_verify(args)
+        if piped_input is not None:
+            # 'find ... | compress out.zip' archives the piped entries under their relative paths
+            src, zipname = "piped entries", args.strip()
+            if not zipname or " " in zipname:
+                raise CommandError("Usage: ... | compress <zipname>")
+            members = self._piped_members(piped_input, collect_members)
+        else:
+            src, zipname = args.split(maxsplit=1)
+            src_path = os.path.join(self.current_path, src)
+            if not os.path.exists(src_path):
+                raise CommandError("Source item not found")
+            members = None
+        zip_path = os.path.join(self.current_path, zipname if zipname.endswith('.zip') else f"{zipname}.zip")
+
+        print(f"Compressing {src} to {zipname}...")
+        if members is None:
+            members = collect_members(src_path, self.current_path)
+        progress = Progress(sum(size for _, _, size in members))
+        digests = compress(members, zip_path, self.config.get('compress_level', 6), workers, progress, verify)
+        progress.finish()
+        if not verify:
+            print(f"Compressed {src} to {zipname}")
+            return
+        failures = verify_archive(zip_path, digests, verify, workers)
+        for name, error in failures:
+            print(f"Failed {name}: {error}")
+        if failures:
+            raise CommandError(f"{len(failures)} of {len(digests)} member(s) of {zipname} failed verification")
+        print(f"Compressed {src} to {zipname} ({len(digests)} member(s) verified with {verify})")
+
+    def _piped_members(self, entries, collect_members):
+        """Archive members for piped entries; a directory brings its whole tree, each file is added once"""
+        members = []
+        seen = set()
+        for entry in entries:
+            if entry.is_dir:
+                found = collect_members(entry.path, self.current_path)
+            else:
+                found = [(entry.path, os.path.relpath(entry.path, self.current_path), entry.size)]
+            for member in found:
+                if member[0] not in seen:
+                    seen.add(member[0])
+                    members.append(member)
+        return members
 
     def decompress_item(self, args):
-        zipname, dst = args.split(maxsplit=1)
+        from archive import select_members, extract
+        args, workers = self._parse_jobs(args, self.config.get('compress_workers') or None)
+        parts = args.split()
+        if len(parts) < 2:
+            raise CommandError("Usage: decompress <zip> <dest> [patterns...]")
+        zipname, dst, *patterns = parts
         zip_path = os.path.join(self.current_path, zipname)
         dst_path = os.path.join(self.current_path, dst)
         if not os.path.exists(zip_path):
-            print("Zip file not found")
-            return
+            raise CommandError("Zip file not found")
 
-        print(f"Decompressing {zipname} to {dst}...")
-        start_time = time.time()
-        total_size = os.path.getsize(zip_path)
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            zf.extractall(dst_path)
-        show_progress(zip_path, dst_path, total_size, start_time, final=True)
-        print(f"Decompressed {zipname} to {dst}")
+        infos = select_members(zip_path, patterns)
+        if not infos:
+            print("No members match " + " ".join(patterns))
+            return
+        print(f"Decompressing {len(infos)} member(s) of {zipname} to {dst}...")
+        progress = Progress(sum(info.file_size for info in infos))
+        failures = extract(zip_path, infos, dst_path, workers, progress)
+        progress.finish()
+        for name, error in failures:
+            print(f"Failed {name}: {error}")
+        print(f"Decompressed {zipname} to {dst}" + (f" with {len(failures)} failure(s)" if failures else ""))
 
-    def interactive_mode(self, operation):
+    def interactive_mode(self, operation, piped_input=None):
         valid_ops = ["delmany", "copy", "move"]
         if operation not in valid_ops:
             print(f"Invalid operation. Use: {', '.join(valid_ops)}")
             return
         
-        print(f"\nInteractive {operation} mode. Enter items one per line (empty line to finish):")
-        items = []
+        items = [os.path.relpath(entry.path, self.current_path) for entry in piped_input or ()]
+        if items:
+            print(f"\nInteractive {operation} mode with {len(items)} piped item(s):")
+            for item in items:
+                print(f"  {item}")
+            print("Enter more items one per line (empty line to finish):")
+        else:
+            print(f"\nInteractive {operation} mode. Enter items one per line (empty line to finish):")
         while True:
             item = input("Item> ").strip()
             if not item:
@@ -385,7 +1214,7 @@ class FileManager:
         if operation == "delmany":
             confirm = input(f"Confirm deletion of {len(items)} item(s)? (y/n): ").lower()
             if confirm == 'y':
-                self.delete_multiple(' '.join(items))
+                self.delete_multiple("", [Entry(os.path.join(self.current_path, item)) for item in items])
         elif operation in ["copy", "move"]:
             dst = input("Destination> ").strip()
             if not dst:
@@ -393,8 +1222,15 @@ class FileManager:
                 return
             confirm = input(f"Confirm {operation} of {len(items)} item(s) to {dst}? (y/n): ").lower()
             if confirm == 'y':
+                dst_path = os.path.join(self.current_path, dst)
+                pairs = []
                 for item in items:
-                    if operation == "copy":
-                        self.copy_item(f"{item} {dst}")
-                    elif operation == "move":
-                        self.move_item(f"{item} {dst}")
\ No newline at end of file
+                    src_path = os.path.join(self.current_path, item)
+                    if os.path.exists(src_path):
+                        pairs.append((src_path, dst_path))
+                    else:
+                        print(f"Skipped {item} - not found")
+                if pairs:
+                    _, _, failures = self._transfer(pairs, self.config.get('transfer_workers', 4), move=operation == "move")
+                    verb = "Copied" if operation == "copy" else "Moved"
+                    print(f"{verb} {len(pairs)} item(s) to {dst}" + (f", {len(failures)} file(s) failed" if failures else ""))
\ No newline at end of file
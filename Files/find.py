@@ -0,0 +1,233 @@
+import os
+import re
+import stat
+import time
+import queue
+import fnmatch
+import operator
+import threading
+from utils import parse_size
+from walker import parallel_walk
+from metrics import count
+
+COMPARE = {">": operator.gt, "<": operator.lt, ">=": operator.ge, "<=": operator.le,
+           "=": operator.eq, "!=": operator.ne}
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+PREDICATE = re.compile(r"^(size|type|name|ext|age|mtime|perm|depth|prune)(>=|<=|!=|=|>|<|~|&)(.+)$")
+
+def parse_duration(text):
+    """Convert a duration such as 30d, 12h or 90s to seconds"""
+    match = re.match(r"^(\d+(?:\.\d+)?)([smhdw]?)$", text.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid age '{text}'. Use e.g. 90s, 15m, 12h, 30d or 2w.")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2) or "s"]
+
+def parse_date(text):
+    import datetime
+    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date '{text}'. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM.")
+
+class Finder:
+    """Predicates compiled once from 'field<op>value' arguments.
+
+    Tests that only need the name or the type reported by scandir run before
+    the ones that need a stat, so most non-matching entries are rejected
+    without a stat call. Directories matching a prune pattern are neither
+    reported nor descended into, and a depth limit stops the walk early.
+    """
+
+    def __init__(self, args, now=None):
+        self.now = time.time() if now is None else now
+        self.prune = []
+        self.max_depth = None
+        self._cheap = []
+        self._stat = []
+        for arg in args:
+            match = PREDICATE.match(arg)
+            if not match:
+                raise ValueError(f"Invalid predicate '{arg}'. Use e.g. size>100MB, age>30d, type=file, "
+                                 "ext=log, name=*.tmp, perm=644, depth<=2, prune=.git")
+            self._compile(*match.groups())
+        self.predicates = tuple(self._cheap) + tuple(self._stat)
+
+    def _compile(self, field, op, value):
+        if field == "prune":
+            if op != "=":
+                raise ValueError("Use prune=<glob>")
+            self.prune.append(value.lower())
+            return
+        if field == "depth":
+            compare = COMPARE.get(op)
+            if compare is None or not value.isdigit():
+                raise ValueError("Depth conditions look like depth<=2")
+            limit = int(value)
+            if op in ("<", "<=", "="):
+                deepest = limit - 1 if op == "<" else limit
+                self.max_depth = deepest if self.max_depth is None else min(self.max_depth, deepest)
+            self._cheap.append(lambda entry, depth: compare(depth, limit))
+            return
+        if field == "type":
+            if op not in ("=", "!=") or value not in ("file", "dir", "link"):
+                raise ValueError("Type conditions look like type=file, type=dir or type=link")
+            negate = op == "!="
+            if value == "link":
+                self._cheap.append(lambda entry, depth: entry.is_symlink() != negate)
+            else:
+                wanted = value == "dir"
+                self._cheap.append(lambda entry, depth: (entry.is_dir(follow_symlinks=False) == wanted) != negate)
+            return
+        if field == "ext":
+            if op not in ("=", "!="):
+                raise ValueError("Extension conditions look like ext=log or ext=jpg,png")
+            suffixes = tuple("." + ext.lower().lstrip(".") for ext in value.split(",") if ext)
+            negate = op == "!="
+            self._cheap.append(lambda entry, depth: entry.name.lower().endswith(suffixes) != negate)
+            return
+        if field == "name":
+            value = value.lower()
+            if op == "~":
+                self._cheap.append(lambda entry, depth: value in entry.name.lower())
+            elif op in ("=", "!="):
+                # Compile the glob once instead of letting fnmatch look it up per entry
+                pattern = re.compile(fnmatch.translate(value))
+                negate = op == "!="
+                self._cheap.append(lambda entry, depth: (pattern.match(entry.name.lower()) is not None) != negate)
+            else:
+                raise ValueError("Name conditions use =, != or ~")
+            return
+        if field == "perm":
+            try:
+                mode = int(value, 8)
+            except ValueError:
+                raise ValueError(f"Invalid permissions '{value}'. Use octal, e.g. perm=644 or perm&111.")
+            if op == "&":
+                # All of the given bits set, like find -perm -mode
+                self._stat.append(lambda entry, depth: entry.stat().st_mode & mode == mode)
+            elif op in ("=", "!="):
+                negate = op == "!="
+                self._stat.append(lambda entry, depth: (stat.S_IMODE(entry.stat().st_mode) == mode) != negate)
+            else:
+                raise ValueError("Permission conditions use =, != or &")
+            return
+
+        compare = COMPARE.get(op)
+        if compare is None:
+            raise ValueError(f"'{field}' conditions use >, <, >=, <=, = or !=")
+        if field == "size":
+            limit = parse_size(value)
+            # Directory sizes from stat are meaningless, so size tests only match files
+            self._stat.append(lambda entry, depth: not entry.is_dir(follow_symlinks=False) and compare(entry.stat().st_size, limit))
+        elif field == "age":
+            seconds = parse_duration(value)
+            now = self.now
+            self._stat.append(lambda entry, depth: compare(now - entry.stat().st_mtime, seconds))
+        elif field == "mtime":
+            when = parse_date(value)
+            self._stat.append(lambda entry, depth: compare(entry.stat().st_mtime, when))
+
+    def is_pruned(self, name):
+        name = name.lower()
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.prune)
+
+    def matches(self, entry, depth):
+        """Whether a DirEntry (or anything with the same methods) at depth passes every predicate"""
+        try:
+            for predicate in self.predicates:
+                if not predicate(entry, depth):
+                    return False
+        except OSError:
+            return False
+        return True
+
+class PathEntry:
+    """The DirEntry methods Finder uses, for a path that did not come from scandir"""
+
+    __slots__ = ('path', 'name', '_stat', '_lstat')
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._stat = None
+        self._lstat = None
+
+    def stat(self, follow_symlinks=True):
+        if not follow_symlinks:
+            if self._lstat is None:
+                self._lstat = os.lstat(self.path)
+                count(stats=1)
+            return self._lstat
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+            count(stats=1)
+        return self._stat
+
+    def is_symlink(self):
+        return stat.S_ISLNK(self.stat(follow_symlinks=False).st_mode)
+
+    def is_dir(self, follow_symlinks=True):
+        try:
+            return stat.S_ISDIR(self.stat(follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+def find_entries(root, finder, workers=8, errors=None):
+    """Yield (DirEntry, depth) for everything under root that the finder matches.
+
+    The walk runs on a parallel_walk pool in the background and matches are
+    handed over a directory at a time, so results stream while the walk is
+    still going. Closing the generator early stops the walk at the next
+    directory. Unreadable directories are appended to errors as (path, error).
+    """
+    results = queue.Queue()
+    stop = threading.Event()
+    done = object()
+    root = os.path.abspath(root)
+    base_depth = root.rstrip(os.sep).count(os.sep)
+
+    def visit(dir_path):
+        if stop.is_set():
+            return ()
+        depth = dir_path.count(os.sep) - base_depth + 1 if dir_path != root else 1
+        descend = finder.max_depth is None or depth < finder.max_depth
+        matched = []
+        subdirs = []
+        seen = 0
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                seen += 1
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                if is_dir and finder.prune and finder.is_pruned(entry.name):
+                    continue
+                if is_dir and descend:
+                    subdirs.append(entry.path)
+                if finder.matches(entry, depth):
+                    matched.append((entry, depth))
+        count(entries=seen)
+        if matched:
+            results.put(matched)
+        return subdirs
+
+    def walk():
+        try:
+            walk_errors = parallel_walk(root, visit, workers)
+            if errors is not None:
+                errors.extend(walk_errors)
+        finally:
+            results.put(done)
+
+    threading.Thread(target=walk, daemon=True).start()
+    try:
+        while True:
+            batch = results.get()
+            if batch is done:
+                return
+            yield from batch
+    finally:
+        stop.set()
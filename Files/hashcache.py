@@ -0,0 +1,63 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+class HashCache:
+    """File digest cache keyed by (device, inode, size, mtime) and the kind of digest.
+
+    A file whose size and mtime are unchanged is assumed to have unchanged content,
+    so repeated runs skip reading it. Entries are LRU-bounded and optionally
+    persisted to a JSON file between sessions.
+    """
+
+    def __init__(self, max_entries=100000, path=None):
+        self.max_entries = max_entries
+        self.path = os.path.expanduser(path) if path else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path:
+            self.load()
+
+    @staticmethod
+    def _key(st, kind):
+        return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}:{kind}"
+
+    def get(self, st, kind):
+        key = self._key(st, kind)
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is not None:
+                self._entries.move_to_end(key)
+            return digest
+
+    def put(self, st, kind, digest):
+        with self._lock:
+            self._entries[self._key(st, kind)] = digest
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def load(self):
+        """Load cached digests from the persistence file, ignoring unreadable files"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for key, digest in list(data.get('entries', {}).items())[-self.max_entries:]:
+                self._entries[key] = digest
+
+    def save(self):
+        """Write cached digests to the persistence file if anything changed"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            data = {'entries': dict(self._entries)}
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+import time
+from metrics import count
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, built REAL);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS entries (dir TEXT, name TEXT, name_lower TEXT, is_dir INTEGER);
+CREATE INDEX IF NOT EXISTS entries_dir ON entries (dir);
+"""
+
+class FileIndex:
+    """On-disk filename index stored in SQLite.
+
+    Every indexed directory is recorded with its mtime. Updating a root stats
+    each known directory and only re-lists the ones whose mtime changed, so a
+    refresh of an unchanged tree costs one stat per directory.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def roots(self):
+        if not self.exists():
+            return []
+        with self._lock:
+            return self.conn.execute("SELECT path, built FROM roots ORDER BY path").fetchall()
+
+    def covering_root(self, path):
+        """Return the indexed root containing path, or None"""
+        for root, _ in self.roots():
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                return root
+        return None
+
+    def build(self, root):
+        """Index root, re-listing only directories whose mtime changed.
+
+        Returns (directories checked, directories re-listed).
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            conn = self.conn
+            known = dict(conn.execute(
+                "SELECT path, mtime_ns FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                (root, _like_prefix(root))))
+            seen = set()
+            checked = rescanned = 0
+            stack = [root]
+            with conn:
+                while stack:
+                    dir_path = stack.pop()
+                    try:
+                        count(stats=1)
+                        mtime_ns = os.stat(dir_path).st_mtime_ns
+                    except OSError:
+                        continue
+                    seen.add(dir_path)
+                    checked += 1
+                    if known.get(dir_path) == mtime_ns:
+                        stack.extend(os.path.join(dir_path, name) for (name,) in conn.execute(
+                            "SELECT name FROM entries WHERE dir = ? AND is_dir = 1", (dir_path,)))
+                        continue
+                    rows = []
+                    try:
+                        with os.scandir(dir_path) as it:
+                            for entry in it:
+                                try:
+                                    is_dir = entry.is_dir(follow_symlinks=False)
+                                except OSError:
+                                    is_dir = False
+                                rows.append((dir_path, entry.name, entry.name.lower(), int(is_dir)))
+                                if is_dir:
+                                    stack.append(entry.path)
+                    except OSError:
+                        continue
+                    count(entries=len(rows))
+                    conn.execute("DELETE FROM entries WHERE dir = ?", (dir_path,))
+                    conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?)", rows)
+                    conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (dir_path, mtime_ns))
+                    rescanned += 1
+                for dir_path in set(known) - seen:
+                    conn.execute("DELETE FROM entries WHERE dir = ?", (dir_path,))
+                    conn.execute("DELETE FROM dirs WHERE path = ?", (dir_path,))
+                conn.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)", (root, time.time()))
+        return checked, rescanned
+
+    def search(self, path, term=None):
+        """Yield (full_path, is_dir) for indexed names under path, optionally containing term"""
+        path = os.path.abspath(path)
+        query = "SELECT dir, name, is_dir FROM entries WHERE (dir = ? OR dir LIKE ? ESCAPE '\\')"
+        params = (path, _like_prefix(path))
+        if term is not None:
+            query += " AND instr(name_lower, ?) > 0"
+            params += (term.lower(),)
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for dir_path, name, is_dir in rows:
+            yield os.path.join(dir_path, name), bool(is_dir)
+
+    def stats(self, root):
+        with self._lock:
+            dirs = self.conn.execute(
+                "SELECT count(*) FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                (root, _like_prefix(root))).fetchone()[0]
+            entries = self.conn.execute(
+                "SELECT count(*) FROM entries WHERE dir = ? OR dir LIKE ? ESCAPE '\\'",
+                (root, _like_prefix(root))).fetchone()[0]
+        return dirs, entries
+
+    def drop(self, root=None):
+        """Remove one root from the index, or delete the whole index file"""
+        with self._lock:
+            if root is None:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+                if self.exists():
+                    os.remove(self.path)
+                return
+            with self.conn:
+                self.conn.execute("DELETE FROM roots WHERE path = ?", (root,))
+                # Keep the data if another indexed root still covers this tree
+                for (other,) in self.conn.execute("SELECT path FROM roots").fetchall():
+                    if root.startswith(other.rstrip(os.sep) + os.sep):
+                        return
+                self.conn.execute("DELETE FROM entries WHERE dir = ? OR dir LIKE ? ESCAPE '\\'", (root, _like_prefix(root)))
+                self.conn.execute("DELETE FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'", (root, _like_prefix(root)))
+                self.conn.execute("DELETE FROM roots WHERE path LIKE ? ESCAPE '\\'", (_like_prefix(root),))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+def _like_prefix(path):
+    escaped = path.rstrip(os.sep).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + os.sep + '%'
@@ -0,0 +1,145 @@
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_local = threading.local()
+
+class JobCancelled(Exception):
+    """Raised at a cancellation point once a job has been asked to stop"""
+
+def current_job():
+    """Return the Job running on this thread, or None in the foreground"""
+    return getattr(_local, 'job', None)
+
+def wrap_stdout(wrapper):
+    """Wrap sys.stdout in wrapper unless one is already somewhere in the chain of stdout wrappers"""
+    stream = sys.stdout
+    while stream is not None:
+        if isinstance(stream, wrapper):
+            return
+        # Wrappers keep the stream they wrap in .stream; read it without their __getattr__ forwarding
+        stream = getattr(stream, '__dict__', {}).get('stream')
+    sys.stdout = wrapper(sys.stdout)
+
+class Job:
+    def __init__(self, job_id, command):
+        self.id = job_id
+        self.command = command
+        self.status = "queued"
+        self.start_time = None
+        self.end_time = None
+        self.progress = ""
+        self.future = None
+        self._cancel = threading.Event()
+        self._output = []
+        # How much of _output 'fg' has already printed, and whether it saw the job finish
+        self.shown = 0
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+
+    def write(self, text):
+        with self._lock:
+            self._output.append(text)
+
+    def read_output(self, start=0):
+        """Return output written since index start, and the new index"""
+        with self._lock:
+            return ''.join(self._output[start:]), len(self._output)
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0
+        return (self.end_time or time.time()) - self.start_time
+
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+class _OutputRouter:
+    """stdout replacement that sends prints from job threads to that job's buffer"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        job = current_job()
+        if job is not None:
+            job.write(text)
+            return len(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        if current_job() is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+class JobManager:
+    """Runs commands on a bounded background executor with cooperative cancellation.
+
+    Long-running loops call check_cancelled() (directly or through Progress) so a
+    cancel request stops a job at the next chunk or file rather than mid-write.
+    """
+
+    def __init__(self, limit=2):
+        self.jobs = {}
+        self._next_id = 1
+        self._executor = ThreadPoolExecutor(max_workers=max(1, limit))
+        wrap_stdout(_OutputRouter)
+
+    def submit(self, command, func):
+        job = Job(self._next_id, command)
+        self._next_id += 1
+        self.jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job, func):
+        if job._cancel.is_set():
+            job.status = "cancelled"
+            return
+        _local.job = job
+        job.status = "running"
+        job.start_time = time.time()
+        try:
+            # func returns the command's error message when it failed
+            error = func()
+            if job._cancel.is_set():
+                job.status = "cancelled"
+            else:
+                job.status = "failed" if error else "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.write(f"Error: {e}\n")
+            job.status = "failed"
+        finally:
+            job.end_time = time.time()
+            _local.job = None
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def running(self):
+        return [job for job in self.jobs.values() if not job.done()]
+
+    def shutdown(self):
+        for job in self.running():
+            job.cancel()
+        self._executor.shutdown(wait=True)
+
+def check_cancelled():
+    """Cancellation point for loops that may run inside a background job"""
+    job = current_job()
+    if job is not None:
+        job.check_cancelled()
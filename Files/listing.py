@@ -0,0 +1,78 @@
+import os
+import stat
+from metrics import count
+
+class Entry:
+    """A filesystem entry passed between pipeline stages.
+
+    The stat result is fetched at most once and cached, and the type comes from
+    the directory scan when possible, so later stages never re-stat an entry.
+    """
+
+    __slots__ = ('name', 'path', 'hits', '_dir_entry', '_stat', '_is_dir', '_size')
+
+    def __init__(self, path, name=None, dir_entry=None, stats=None, is_dir=None):
+        self.path = path
+        self.name = name if name is not None else os.path.basename(path)
+        self.hits = None
+        self._dir_entry = dir_entry
+        self._stat = stats
+        self._is_dir = is_dir
+        self._size = None
+
+    @property
+    def stat(self):
+        if self._stat is None:
+            self._stat = self._dir_entry.stat() if self._dir_entry is not None else os.stat(self.path)
+            count(stats=1)
+        return self._stat
+
+    @property
+    def is_dir(self):
+        if self._is_dir is None:
+            if self._stat is None and self._dir_entry is not None:
+                try:
+                    self._is_dir = self._dir_entry.is_dir()
+                except OSError:
+                    self._is_dir = False
+            else:
+                try:
+                    self._is_dir = stat.S_ISDIR(self.stat.st_mode)
+                except OSError:
+                    self._is_dir = False
+        return self._is_dir
+
+    @property
+    def size(self):
+        """File size, or the directory total once one has been computed"""
+        if self._size is not None or self.is_dir:
+            return self._size
+        return self.stat.st_size
+
+    @size.setter
+    def size(self, value):
+        self._size = value
+
+def scan_directory(path, base_path=None):
+    """Yield an Entry per item in path without stat'ing anything up front"""
+    seen = 0
+    try:
+        with os.scandir(path) as it:
+            for dir_entry in it:
+                name = dir_entry.name if base_path is None else os.path.relpath(dir_entry.path, base_path)
+                seen += 1
+                yield Entry(dir_entry.path, name, dir_entry=dir_entry)
+    finally:
+        # Counted once per directory, also when the consumer stops early
+        count(entries=seen)
+
+def walk_entries(path):
+    """Yield an Entry for everything below path, named relative to it"""
+    for root, dirs, files in os.walk(path):
+        count(entries=len(dirs) + len(files))
+        for name in dirs:
+            full_path = os.path.join(root, name)
+            yield Entry(full_path, os.path.relpath(full_path, path), is_dir=True)
+        for name in files:
+            full_path = os.path.join(root, name)
+            yield Entry(full_path, os.path.relpath(full_path, path), is_dir=False)
@@ -1,9 +1,65 @@
 import sys
+import argparse
 from .file_manager import FileManager
 from .config import load_config
 
-def run():
-    config = load_config()
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="files", description="A command-line file explorer")
+    parser.add_argument('-c', dest='commands', metavar='COMMANDS',
+                        help="run ';'-separated commands and exit")
+    parser.add_argument('--script', metavar='FILE',
+                        help="run commands from FILE, one per line ('-' reads stdin)")
+    parser.add_argument('--json', action='store_true',
+                        help="print JSON lines instead of text (with -c/--script)")
+    parser.add_argument('--keep-going', action='store_true',
+                        help="carry on after a failing command instead of stopping")
+    parser.add_argument('--config', metavar='FILE', help="read settings from FILE")
+    return parser.parse_args(argv)
+
+def split_stages(command, aliases):
+    """Split a command line on '|' and expand aliases in every stage"""
+    return [aliases.get(cmd.strip(), cmd.strip()) for cmd in command.split('|')]
+
+def dispatch(file_manager, command, aliases):
+    """Run one command line exactly as if it had been typed at the prompt.
+
+    Returns the error message if the command failed, else None.
+    """
+    if command.endswith('&'):
+        if file_manager.start_job(split_stages(command[:-1], aliases)) is None:
+            return "Command not started"
+    elif '|' in command:
+        return file_manager.run_pipeline(split_stages(command, aliases))
+    elif command.lower() == "help":
+        show_help()
+    else:
+        command = aliases.get(command, command)
+        if command.lower().startswith("interactive"):
+            file_manager.interactive_mode(command[11:].strip() if len(command) > 11 else "")
+        else:
+            return file_manager.execute_command(command)
+    return None
+
+def run(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.commands is not None or args.script:
+        from .batch import run_batch, read_script
+        try:
+            commands = read_script(args.script) if args.script else []
+        except OSError as e:
+            print(f"Error: cannot read script: {e}", file=sys.stderr)
+            sys.exit(2)
+        if args.commands is not None:
+            commands += args.commands.split(';')
+        sys.exit(run_batch(FileManager(config), commands, config.get('aliases', {}), dispatch,
+                           json_output=args.json, keep_going=args.keep_going))
+
     print("""
         ____________________            
         ___  ____/__(_)__  /____________
@@ -16,6 +72,7 @@ def run():
     print("Type 'help' for commands")
     
     file_manager = FileManager(config)
+    file_manager.completer.install(lambda: file_manager.current_path)
     command_history = []
     aliases = config.get('aliases', {})
     
@@ -24,8 +81,8 @@ def run():
             command = input("FE> ").strip()
             if command:
                 if command.endswith('?'):
-                    base_cmd = command[:-1].strip()
-                    suggestions = file_manager.get_command_suggestions(base_cmd, include_files=True)
+                    # Keep a trailing space: 'cd ?' lists paths, 'cd?' lists commands
+                    suggestions = file_manager.get_command_suggestions(command[:-1], include_files=True)
                     if suggestions:
                         print("Suggestions:", ", ".join(suggestions))
                     continue
@@ -33,32 +90,17 @@ def run():
                 command_history.append(command)
                 if len(command_history) > config.get('history_size', 10):
                     command_history.pop(0)
-                
-                if '|' in command:
-                    commands = [cmd.strip() for cmd in command.split('|')]
-                    output = None
-                    for cmd in commands:
-                        cmd = aliases.get(cmd, cmd)
-                        output = file_manager.execute_command(cmd, output)
-                    if output:
-                        print(output)
-                    continue
-                
-                command = aliases.get(command, command)
-                if command.lower().startswith("interactive"):
-                    file_manager.interactive_mode(command[11:].strip() if len(command) > 11 else "")
-                else:
-                    file_manager.execute_command(command)
             
             if command.lower() == "exit":
+                file_manager.close()
                 print("Goodbye!")
                 break
-            elif command.lower() == "help":
-                show_help()
             elif command.lower() == "history":
                 print("\nCommand History:")
                 for i, cmd in enumerate(command_history, 1):
                     print(f"{i}. {cmd}")
+            elif command:
+                dispatch(file_manager, command, aliases)
         except KeyboardInterrupt:
             print("\nUse 'exit' to quit")
         except Exception as e:
@@ -67,26 +109,50 @@ def run():
 def show_help():
     print("""
     Available commands:
-    dir [sort:size|name] [type:file|dir] - List contents (with size/permissions)
+    dir [sort:size|name] [type:file|dir] [size:deep] [--limit N] [--page] - List contents (size:deep adds directory sizes)
     cd <path>     - Change directory
     pwd           - Show current path
     info <name>   - Show file/directory info (with permissions)
-    copy <src> <dst> - Copy file or directory (with progress)
-    move <src> <dst> - Move file or directory (with progress)
+    copy <src> <dst> [-j N] [--verify] - Copy file or directory (with progress, N parallel files)
+    move <src> <dst> [-j N] [--verify] - Move file or directory (renames when on the same device)
     del <name>    - Delete file or directory
-    delmany <name1> <name2> ... - Delete multiple files/directories
+    delmany <name1> <name2> ... - Delete multiple files/directories (globs like *.tmp allowed)
     mkdir <name>  - Create directory
     rename <old> <new> - Rename file/directory
-    search <term> [-r] [-c] - Search files (optional -r recursive, -c content)
-    compress <name> <zipname> - Compress file/directory to zip
-    decompress <zipname> <dst> - Decompress zip to directory
+    search <term> [-r] [-c] [-e] [-w] [-n] [-j N] [--max-size SIZE] - Search files
+                  (-r recursive, -c content, -e regex, -w whole word, -n line/offset of hits, -j workers)
+                  content searches ignore case, but with -e only for ASCII letters
+                  dir and search also take --limit N (stop after N rows) and --page (pause every screen)
+    compress <name> <zipname> [-j N] [--verify] - Compress file/directory to zip (N parallel members)
+    decompress <zipname> <dst> [glob ...] [-j N] - Decompress zip (optionally only matching members)
+    index build|status|drop [path] - Maintain the filename index used by 'search -r'
+    find [path] <pred> ... [-j N] - Find entries below path, e.g. 'find logs size>100MB age>30d'
+                  (size, age, mtime, type=file|dir|link, name=glob, name~text, ext=a,b, perm=644,
+                   perm&111, depth<=N, prune=glob; pipe into delmany or compress out.zip)
     clear         - Clear the screen
     history       - Show command history
     interactive [delmany|copy|move] - Interactive batch mode
+    where <cond> ... - Filter entries (size>1MB, size<=10KB, type=dir, name~log, name=*.py, ext=py)
+    head [N]      - Keep the first N entries (default 10)
+    watch [path] [type:file|dir] [size:deep] [--poll] [--interval S] - List a directory and show changes live
+    du [path] [--depth N] [--top N] [-j N] - Disk usage per directory with largest files/dirs
+    dupes [-r] [-j N] - Find duplicate files (pipe into delmany to remove extra copies)
+    sync <src> <dst> [--delete] [--checksum] [--dry-run] [--fat] [-j N] - Copy only new/changed files
+                  (--fat lets mtimes differ by up to 2s, for FAT-formatted drives)
+    checksum [path] [-r] [--algo NAME] [-o manifest] [-j N] - Hash files into a manifest (sha256sum --tag format)
+    verify <manifest> <path> [-j N] - Re-hash the files a manifest lists below path
+                  (--verify on copy/move/compress hashes data as it streams and checks the result)
+    <command> &   - Run a command in the background
+    jobs          - List background jobs with progress
+    fg <id>       - Show a job's output and wait for it (Ctrl-C to detach)
+    cancel <id>   - Stop a background job at its next safe point
+    stats [last [N]|reset|export <file>] - Time, entries, stat calls, I/O and print time per command
+    profile on [N]|off - Show the N hottest functions (cProfile) after each command
     exit          - Quit the program
     
-    Tip: Type '<command>?' for enhanced suggestions
-    Pipe: Use '|' to chain commands (e.g., 'dir | search test')
+    Tip: Press Tab to complete commands and paths (e.g. 'cd src/ut<Tab>'), or type '<command>?' to list them
+    Pipe: Use '|' to chain commands (e.g., 'dir | search test | where size>1MB | head 5')
+          dir, search, du, dupes, where and head pass entries on; delmany and interactive can consume them
     """)
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+import json
+import time
+import threading
+from collections import deque
+from jobs import current_job, wrap_stdout
+
+_lock = threading.Lock()
+_active = []
+_local = threading.local()
+# Per-thread [entries, stats, read_bytes, write_bytes], and the sum for threads that have exited
+_tallies = {}
+_retired = [0, 0, 0, 0]
+
+def count(entries=0, stats=0, read_bytes=0, write_bytes=0):
+    """Add to the counters of the commands currently being measured.
+
+    read_bytes and write_bytes are only for I/O that bypasses read()/write()
+    (memory-mapped scans, in-kernel copies), which /proc/self/io cannot see.
+    Each thread adds to its own tally without locking, and a command takes the
+    difference of the summed tallies between its start and end. Counters are
+    process-wide, so work done by a background job running at the same time is
+    included in a foreground command's numbers and vice versa.
+    """
+    if not _active:
+        return
+    try:
+        tally = _local.tally
+    except AttributeError:
+        tally = _local.tally = [0, 0, 0, 0]
+        with _lock:
+            _tallies[threading.current_thread()] = tally
+    tally[0] += entries
+    tally[1] += stats
+    tally[2] += read_bytes
+    tally[3] += write_bytes
+
+def _counters():
+    """Sum the tallies of all threads, folding those of exited threads into _retired"""
+    with _lock:
+        for thread in [thread for thread in _tallies if not thread.is_alive()]:
+            for i, value in enumerate(_tallies.pop(thread)):
+                _retired[i] += value
+        totals = list(_retired)
+        for tally in _tallies.values():
+            for i, value in enumerate(tally):
+                totals[i] += value
+    return totals
+
+def _io_counters():
+    """Return (bytes read, bytes written) by this process's syscalls, or None"""
+    try:
+        with open('/proc/self/io') as f:
+            values = dict(line.split(': ') for line in f.read().splitlines())
+        return int(values['rchar']), int(values['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+class CommandMetrics:
+    """Measurements taken while a single command ran"""
+
+    def __init__(self, command):
+        self.command = command
+        self.start_time = time.time()
+        self.wall_time = 0.0
+        self.entries = 0
+        self.stat_calls = 0
+        self.read_bytes = None
+        self.write_bytes = None
+        self.print_time = 0.0
+        self._counters_start = _counters()
+        self._started = time.perf_counter()
+        self._io_start = _io_counters()
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self._started
+        io_end = _io_counters()
+        entries, stats, extra_read, extra_write = (end - start for start, end in zip(self._counters_start, _counters()))
+        self.entries = entries
+        self.stat_calls = stats
+        if self._io_start and io_end:
+            self.read_bytes = io_end[0] - self._io_start[0] + extra_read
+            self.write_bytes = io_end[1] - self._io_start[1] + extra_write
+
+    def as_dict(self):
+        return {
+            'command': self.command,
+            'start': round(self.start_time, 3),
+            'wall_s': round(self.wall_time, 6),
+            'entries': self.entries,
+            'stat_calls': self.stat_calls,
+            'read_bytes': self.read_bytes,
+            'write_bytes': self.write_bytes,
+            'print_s': round(self.print_time, 6),
+        }
+
+class _TimedStream:
+    """stdout wrapper that charges time spent writing to the commands being measured"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        if not _active:
+            return self.stream.write(text)
+        start = time.perf_counter()
+        try:
+            return self.stream.write(text)
+        finally:
+            self._charge(time.perf_counter() - start)
+
+    def flush(self):
+        if not _active:
+            return self.stream.flush()
+        start = time.perf_counter()
+        try:
+            return self.stream.flush()
+        finally:
+            self._charge(time.perf_counter() - start)
+
+    def _charge(self, elapsed):
+        with _lock:
+            for record in _active:
+                record.print_time += elapsed
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+class Metrics:
+    """Per-command metrics for the session, with optional cProfile and JSON-lines export"""
+
+    def __init__(self, history=1000, export_path=None, profile_top=20):
+        self.history = deque(maxlen=history)
+        self.totals = {}
+        self.export_path = export_path
+        self.profile_top = profile_top
+        self.profiling = False
+        wrap_stdout(_TimedStream)
+
+    def measure(self, command):
+        """Context manager recording command; nested calls on one thread are folded into the outer one"""
+        return _Measurement(self, command)
+
+    def _record(self, record):
+        self.history.append(record)
+        name = record.command.split(maxsplit=1)[0].lower() if record.command.strip() else ""
+        with _lock:
+            total = self.totals.setdefault(name, [0, 0.0, 0, 0, 0, 0, 0.0])
+            total[0] += 1
+            total[1] += record.wall_time
+            total[2] += record.entries
+            total[3] += record.stat_calls
+            total[4] += record.read_bytes or 0
+            total[5] += record.write_bytes or 0
+            total[6] += record.print_time
+        if self.export_path:
+            try:
+                self.export(self.export_path, [record])
+            except OSError as e:
+                print(f"Could not write metrics to {self.export_path}: {e}")
+
+    def export(self, path, records=None):
+        """Append records (default: the whole session history) to path as JSON lines"""
+        records = self.history if records is None else records
+        with open(path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record.as_dict()) + '\n')
+        return len(records)
+
+    def reset(self):
+        self.history.clear()
+        with _lock:
+            self.totals.clear()
+
+class _Measurement:
+    def __init__(self, metrics, command):
+        self.metrics = metrics
+        self.command = command
+        self.record = None
+        self.profiler = None
+
+    def __enter__(self):
+        if getattr(_local, 'depth', 0):
+            _local.depth += 1
+            return None
+        _local.depth = 1
+        self.record = CommandMetrics(self.command)
+        with _lock:
+            _active.append(self.record)
+        # cProfile only sees the calling thread and only one profiler can run at
+        # a time, so background jobs are measured but never profiled
+        if self.metrics.profiling and current_job() is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                self.profiler = None
+        return self.record
+
+    def __exit__(self, *exc):
+        _local.depth -= 1
+        if self.record is None:
+            return False
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.record.finish()
+        with _lock:
+            _active.remove(self.record)
+        self.metrics._record(self.record)
+        if self.profiler is not None:
+            import io
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(self.metrics.profile_top)
+            print(out.getvalue().rstrip())
+        return False
@@ -0,0 +1,228 @@
+import os
+import stat
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from jobs import current_job
+
+# fd-relative deletion avoids resolving the full path again for every entry
+DIR_FD_SUPPORTED = os.unlink in os.supports_dir_fd and os.rmdir in os.supports_dir_fd and os.scandir in os.supports_fd
+DIR_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_NOFOLLOW', 0)
+
+class RemovalStats:
+    """Thread-safe count of removed files and directories with periodic throughput output"""
+
+    def __init__(self, interval=0.5):
+        self.files = 0
+        self.dirs = 0
+        self.start_time = time.time()
+        self.interval = interval
+        self.job = current_job()
+        self._last_print = self.start_time
+        self._lock = threading.Lock()
+
+    def add(self, files=0, dirs=0):
+        if self.job:
+            self.job.check_cancelled()
+        with self._lock:
+            self.files += files
+            self.dirs += dirs
+            now = time.time()
+            if now - self._last_print >= self.interval:
+                self._last_print = now
+                line = f"{self.files} file(s) removed ({self.rate():.0f} files/s)"
+                if self.job:
+                    self.job.progress = line
+                else:
+                    print(f"\r{line}", end='', flush=True)
+
+    def rate(self):
+        elapsed = time.time() - self.start_time
+        return self.files / elapsed if elapsed > 0 else 0
+
+class _Node:
+    """A directory being cleared; removed once its own scan and all its subdirectories are done"""
+
+    __slots__ = ('path', 'parent', 'pending', 'failed')
+
+    def __init__(self, path, parent):
+        self.path = path
+        self.parent = parent
+        self.pending = 1
+        self.failed = False
+
+class _TreeRemoval:
+    """Clears directory trees on a pool with one task per directory, at every depth.
+
+    A task unlinks the files of its directory and submits each subdirectory as
+    a task of its own, so one huge subtree is spread over every worker. A
+    directory is removed by whichever task finishes last among its own scan and
+    its subdirectories'; a failure below it leaves it (and its parents) in place.
+    """
+
+    def __init__(self, pool, stats):
+        self.pool = pool
+        self.stats = stats
+        self.failures = []
+        # Set when a worker is cancelled; the remaining tasks then only finish their bookkeeping
+        self.error = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+
+    def submit(self, path, parent=None):
+        node = _Node(path, parent)
+        with self._lock:
+            self._outstanding += 1
+            if parent is not None:
+                parent.pending += 1
+        try:
+            self.pool.submit(self._run, node)
+        except RuntimeError:
+            # The pool is shutting down after a cancellation
+            with self._lock:
+                self._outstanding -= 1
+                if parent is not None:
+                    parent.pending -= 1
+            raise
+
+    def wait(self):
+        with self._lock:
+            while self._outstanding:
+                self._idle.wait()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self, node):
+        try:
+            if self.error is None:
+                self._clear(node)
+        except OSError as e:
+            self._fail(node, e)
+        except Exception as e:
+            self._cancel(node, e)
+        try:
+            self._finish(node)
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+                if not self._outstanding:
+                    self._idle.notify_all()
+
+    def _clear(self, node):
+        # Anything that vanished meanwhile (deleted by someone else) counts as removed
+        files = 0
+        if not DIR_FD_SUPPORTED:
+            try:
+                with os.scandir(node.path) as it:
+                    entries = list(it)
+            except FileNotFoundError:
+                return
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    self.submit(entry.path, node)
+                else:
+                    try:
+                        os.unlink(entry.path)
+                        files += 1
+                    except FileNotFoundError:
+                        pass
+            self.stats.add(files=files)
+            return
+        try:
+            fd = os.open(node.path, DIR_FLAGS)
+        except FileNotFoundError:
+            return
+        try:
+            with os.scandir(fd) as it:
+                entries = list(it)
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    self.submit(os.path.join(node.path, entry.name), node)
+                else:
+                    try:
+                        os.unlink(entry.name, dir_fd=fd)
+                        files += 1
+                    except FileNotFoundError:
+                        pass
+        finally:
+            os.close(fd)
+        self.stats.add(files=files)
+
+    def _finish(self, node):
+        """Drop one pending reference and remove every directory that became empty"""
+        while node is not None:
+            with self._lock:
+                node.pending -= 1
+                if node.pending:
+                    return
+                failed = node.failed or self.error is not None
+            if not failed:
+                try:
+                    os.rmdir(node.path)
+                    self.stats.add(dirs=1)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self._fail(node, e)
+                    failed = True
+                except Exception as e:
+                    self._cancel(node, e)
+                    failed = True
+            if failed and node.parent is not None:
+                node.parent.failed = True
+            node = node.parent
+
+    def _fail(self, node, error):
+        with self._lock:
+            self.failures.append((node.path, error))
+            node.failed = True
+
+    def _cancel(self, node, error):
+        with self._lock:
+            if self.error is None:
+                self.error = error
+            node.failed = True
+
+def _outermost(paths):
+    """Drop repeated paths and paths inside another of the given paths, which removes them anyway"""
+    absolute = [os.path.abspath(path) for path in paths]
+    targets = set(absolute)
+    kept = []
+    seen = set()
+    for path, full_path in zip(paths, absolute):
+        parent = os.path.dirname(full_path)
+        while parent not in targets and os.path.dirname(parent) != parent:
+            parent = os.path.dirname(parent)
+        if parent not in targets and full_path not in seen:
+            seen.add(full_path)
+            kept.append(path)
+    return kept
+
+def remove_paths(paths, workers=4, stats=None):
+    """Delete files and directory trees, clearing directories concurrently.
+
+    Every directory, at any depth, is scanned by its own pool task that unlinks
+    its files and hands its subdirectories back to the pool; a directory is
+    removed once all of its subdirectories are gone. Paths inside another of
+    the given paths are skipped, so 'find ... | delmany' does not race with
+    itself. Returns a list of (path, error) for items that failed.
+    """
+    stats = stats or RemovalStats()
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        removal = _TreeRemoval(pool, stats)
+        for path in _outermost(paths):
+            try:
+                st = os.lstat(path)
+                if stat.S_ISDIR(st.st_mode):
+                    removal.submit(path)
+                else:
+                    os.unlink(path)
+                    stats.add(files=1)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                failures.append((path, e))
+        removal.wait()
+    return failures + removal.failures
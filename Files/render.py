@@ -0,0 +1,105 @@
+import sys
+import time
+from utils import COLOR
+from jobs import current_job
+
+_time_cache = {}
+
+def format_mtime(timestamp):
+    """Format a timestamp as 'YYYY-MM-DD HH:MM', reusing the string for every file in the same minute"""
+    bucket = int(timestamp // 60)
+    text = _time_cache.get(bucket)
+    if text is None:
+        if len(_time_cache) > 4096:
+            _time_cache.clear()
+        import datetime
+        text = datetime.datetime.fromtimestamp(bucket * 60).strftime('%Y-%m-%d %H:%M')
+        _time_cache[bucket] = text
+    return text
+
+def parse_render_options(args):
+    """Strip '--limit N' and '--page' from args and return (args, limit, page)"""
+    parts = args.split()
+    limit = None
+    page = False
+    kept = []
+    options = iter(parts)
+    for part in options:
+        if part == "--limit":
+            value = next(options, "")
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError("Invalid limit. Use '--limit N' with N >= 1.")
+            limit = int(value)
+        elif part == "--page":
+            page = True
+        else:
+            kept.append(part)
+    return " ".join(kept), limit, page
+
+class Renderer:
+    """Collects output rows and writes them to stdout in batches.
+
+    A batch is written once batch_size lines are buffered, or when a line
+    arrives interval seconds after the last write. Nothing is written while the
+    producer is blocked, so callers whose rows arrive slowly (content search)
+    flush after each one. Colors are dropped when stdout is not a terminal. With a limit, row()
+    returns False once enough rows are shown so callers can stop before
+    formatting anything else; with paging, output pauses after every screenful
+    until the user continues or quits (which also makes row() return False).
+    """
+
+    def __init__(self, use_colors=True, limit=None, page=False, batch_size=512, interval=0.1, stream=None):
+        self.stream = stream or sys.stdout
+        isatty = getattr(self.stream, 'isatty', None)
+        self.use_colors = use_colors and bool(isatty and isatty())
+        self.limit = limit
+        self.batch_size = batch_size
+        self.interval = interval
+        self.page_size = None
+        if page and current_job() is None and sys.stdin.isatty():
+            import shutil
+            self.page_size = max(1, shutil.get_terminal_size().lines - 2)
+        self.rows = 0
+        self.stopped = False
+        self._buffer = []
+        self._page_rows = 0
+        self._last_flush = time.monotonic()
+
+    def wants_more(self):
+        """Whether another row would be shown"""
+        return not self.stopped and (self.limit is None or self.rows < self.limit)
+
+    def line(self, text, color=None):
+        """Buffer a line that does not count as a row (headers, footers)"""
+        self._buffer.append(f"{color}{text}{COLOR.RESET}\n" if color and self.use_colors else text + "\n")
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def row(self, text, color=None):
+        """Buffer one result row; returns False once no further rows will be shown"""
+        if not self.wants_more():
+            return False
+        self.line(text, color)
+        self.rows += 1
+        self._page_rows += 1
+        if self.page_size and self._page_rows >= self.page_size:
+            self._page_rows = 0
+            self.flush()
+            try:
+                answer = input("-- more -- (Enter to continue, q to quit) ")
+            except EOFError:
+                answer = "q"
+            if answer.strip().lower() == "q":
+                self.stopped = True
+        return self.wants_more()
+
+    def flush(self):
+        if self._buffer:
+            self.stream.write(''.join(self._buffer))
+            self._buffer.clear()
+        self.stream.flush()
+        self._last_flush = time.monotonic()
+
+    def truncated(self):
+        """True when rows were cut off by the limit or by quitting the pager"""
+        return self.stopped or (self.limit is not None and self.rows >= self.limit)
@@ -0,0 +1,149 @@
+import os
+import re
+import mmap
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from jobs import check_cancelled
+from metrics import count
+
+CHUNK_SIZE = 1024 * 1024
+SNIFF_SIZE = 8192
+OVERLAP = 4096
+
+def _fold_literal(term):
+    """Escape term for a bytes pattern that matches its non-ASCII letters in either case.
+
+    re.IGNORECASE only folds ASCII letters in bytes patterns, so a letter like
+    'ä' becomes an alternation of the UTF-8 encodings of 'ä' and 'Ä'.
+    """
+    parts = []
+    for char in term:
+        if ord(char) < 128:
+            parts.append(re.escape(char.encode('ascii')))
+            continue
+        variants = sorted({variant for variant in (char, char.lower(), char.upper(), char.title())
+                           if len(variant) == 1 and variant.lower() == char.lower()})
+        encoded = [re.escape(variant.encode('utf-8')) for variant in variants]
+        parts.append(encoded[0] if len(encoded) == 1 else b"(?:" + b"|".join(encoded) + b")")
+    return b"".join(parts)
+
+def compile_pattern(term, regex=False, whole_word=False, as_bytes=True):
+    """Compile a case-insensitive search pattern for file content (bytes) or names (str).
+
+    Literal content terms match non-ASCII letters case-insensitively too; in a
+    regular expression (-e) only ASCII letters are, as usual for bytes patterns.
+    """
+    if not as_bytes:
+        source = term if regex else re.escape(term)
+        if whole_word:
+            source = rf"\b(?:{source})\b"
+        return re.compile(source, re.IGNORECASE)
+    source = term.encode('utf-8') if regex else _fold_literal(term)
+    if whole_word:
+        # \b treats UTF-8 bytes of non-ASCII letters as non-word characters
+        source = rb"(?<![\w\x80-\xff])(?:" + source + rb")(?![\w\x80-\xff])"
+    return re.compile(source, re.IGNORECASE)
+
+def _count_newlines(buf, start, end):
+    # Count in bounded slices so a sparse match never copies the whole file
+    count = 0
+    for pos in range(start, end, CHUNK_SIZE):
+        count += buf[pos:min(pos + CHUNK_SIZE, end)].count(b'\n')
+    return count
+
+def scan_file(path, pattern, max_size=None, all_matches=False):
+    """Return a list of (line, offset) hits for pattern in a file.
+
+    The file is memory-mapped and the compiled bytes pattern runs directly over
+    the mapping, so no decoded or lowercased copy is made. Without all_matches
+    the scan stops at the first hit. Files that look binary (a NUL byte in the
+    first few KB) or exceed max_size yield no hits.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if max_size is not None and size > max_size:
+            return []
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty and special files cannot be mapped
+            return _scan_chunks(f, pattern, all_matches)
+        count(read_bytes=size)
+        with mm:
+            if mm.find(b'\0', 0, SNIFF_SIZE) != -1:
+                return []
+            hits = []
+            line, last = 1, 0
+            for match in pattern.finditer(mm):
+                if not all_matches:
+                    return [(None, match.start())]
+                line += _count_newlines(mm, last, match.start())
+                last = match.start()
+                hits.append((line, match.start()))
+            return hits
+
+def _scan_chunks(f, pattern, all_matches):
+    """Fallback for unmappable files: scan fixed-size chunks with an overlap.
+
+    Only matches starting before the overlap region are reported from each
+    buffer; the overlap is rescanned with the next chunk so matches crossing a
+    chunk boundary are still found exactly once.
+    """
+    hits = []
+    tail = b''
+    base, line = 0, 1
+    chunk = f.read(CHUNK_SIZE)
+    if b'\0' in chunk[:SNIFF_SIZE]:
+        return hits
+    while chunk:
+        buf = tail + chunk
+        chunk = f.read(CHUNK_SIZE)
+        limit = len(buf) if not chunk else max(len(buf) - OVERLAP, 0)
+        last = 0
+        for match in pattern.finditer(buf):
+            if match.start() >= limit:
+                break
+            if not all_matches:
+                return [(None, base + match.start())]
+            line += buf.count(b'\n', last, match.start())
+            last = match.start()
+            hits.append((line, base + match.start()))
+        line += buf.count(b'\n', last, limit)
+        tail = buf[limit:]
+        base += limit
+    return hits
+
+def _scan(path, pattern, max_size, all_matches):
+    try:
+        return scan_file(path, pattern, max_size, all_matches)
+    except OSError:
+        return []
+
+def search_contents(items, pattern, workers=None, max_size=None, processes=False, all_matches=False):
+    """Yield (item, hits) for (item, path) pairs whose file matches, as workers find them.
+
+    Only the path is sent to workers; the item stays with the caller. Items are
+    consumed lazily and at most a few batches are in flight at once, so results
+    stream out while the caller is still walking the tree.
+    """
+    workers = workers or os.cpu_count() or 1
+    if processes:
+        # Pulls in multiprocessing, so only imported when asked for
+        from concurrent.futures import ProcessPoolExecutor
+    executor_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_cls(max_workers=workers) as pool:
+        pending = {}
+        for item, path in items:
+            check_cancelled()
+            pending[pool.submit(_scan, path, pattern, max_size, all_matches)] = item
+            if len(pending) >= workers * 4:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    if future.result():
+                        yield item, future.result()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                if future.result():
+                    yield item, future.result()
@@ -0,0 +1,116 @@
+import os
+import json
+import stat
+import threading
+from collections import OrderedDict
+from metrics import count
+
+class SizeCache:
+    """Directory size cache keyed by (device, inode) and invalidated by directory mtime.
+
+    Each cached directory remembers the bytes of its own files and the names of its
+    subdirectories. Looking up a tree only re-scans directories whose mtime changed;
+    unchanged ones cost a single stat, and child totals are rolled up into parents.
+    A file rewritten in place does not touch its directory's mtime, so its new size
+    is picked up the next time that directory changes.
+    """
+
+    def __init__(self, max_entries=100000, path=None):
+        self.max_entries = max_entries
+        self.path = os.path.expanduser(path) if path else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path:
+            self.load()
+
+    def get_size(self, path):
+        """Return the total size in bytes of a file or directory tree"""
+        st = os.stat(path)
+        if not stat.S_ISDIR(st.st_mode):
+            return st.st_size
+        order = []
+        stack = [(path, st)]
+        while stack:
+            dir_path, dir_st = stack.pop()
+            own, subdirs = self._node(dir_path, dir_st)
+            children = []
+            for name in subdirs:
+                child = os.path.join(dir_path, name)
+                try:
+                    child_st = os.lstat(child)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(child_st.st_mode):
+                    children.append(child)
+                    stack.append((child, child_st))
+            order.append((dir_path, own, children))
+
+        # Pre-order reversed visits children before their parents
+        totals = {}
+        for dir_path, own, children in reversed(order):
+            totals[dir_path] = own + sum(totals[child] for child in children)
+        return totals[path]
+
+    def _node(self, path, st):
+        key = (st.st_dev, st.st_ino)
+        with self._lock:
+            node = self._entries.get(key)
+            if node is not None and node[0] == st.st_mtime_ns:
+                self._entries.move_to_end(key)
+                return node[1], node[2]
+
+        own = seen = stats = 0
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    seen += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif not entry.is_symlink() or entry.is_file():
+                            stats += 1
+                            own += entry.stat().st_size
+                    except OSError:
+                        continue
+        except OSError:
+            return 0, []
+        count(entries=seen, stats=stats)
+
+        with self._lock:
+            self._entries[key] = (st.st_mtime_ns, own, subdirs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        return own, subdirs
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def load(self):
+        """Load cached entries from the persistence file, ignoring unreadable files"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for dev, ino, mtime_ns, own, subdirs in data.get('entries', [])[-self.max_entries:]:
+                self._entries[(dev, ino)] = (mtime_ns, own, subdirs)
+
+    def save(self):
+        """Write cached entries to the persistence file if anything changed"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            data = {'entries': [[dev, ino, mtime_ns, own, subdirs]
+                                for (dev, ino), (mtime_ns, own, subdirs) in self._entries.items()]}
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,119 @@
+import os
+from walker import parallel_walk
+from transfer import TransferPlan
+from checksum import cached_hash
+from metrics import count
+
+# Filesystems such as FAT only keep mtimes to the nearest two seconds; sync --fat allows for it
+FAT_MTIME_WINDOW_NS = 2 * 10 ** 9
+
+def snapshot(root, workers=8):
+    """Map each path below root (relative to it) to (kind, size, mtime_ns).
+
+    kind is 'dir', 'file' or 'link' (a symlink to a directory). Files are
+    described by the stat of what they point to, as that is what gets copied.
+    """
+    entries = {}
+    if not os.path.isdir(root):
+        return entries
+
+    def visit(dir_path):
+        rel_dir = os.path.relpath(dir_path, root)
+        found = {}
+        subdirs = []
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                rel = entry.name if rel_dir == '.' else os.path.join(rel_dir, entry.name)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        found[rel] = ('dir', 0, 0)
+                        subdirs.append(entry.path)
+                    elif entry.is_symlink() and entry.is_dir():
+                        found[rel] = ('link', 0, 0)
+                    else:
+                        st = entry.stat()
+                        found[rel] = ('file', st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+        count(entries=len(found), stats=sum(1 for kind, _, _ in found.values() if kind == 'file'))
+        entries.update(found)
+        return subdirs
+
+    parallel_walk(root, visit, workers)
+    return entries
+
+class SyncPlan:
+    """Changes needed to make dst mirror src"""
+
+    def __init__(self, src, dst):
+        self.src = src
+        self.dst = dst
+        self.new = []
+        self.changed = []
+        self.delete = []
+        self.transfer = TransferPlan()
+
+    def is_empty(self):
+        return not (self.new or self.changed or self.delete)
+
+def plan_sync(src, dst, delete=False, checksum=False, workers=8, hash_cache=None, mtime_window_ns=0):
+    """Compare src and dst by size and mtime (optionally by content) and plan the sync.
+
+    mtimes must match exactly unless mtime_window_ns allows them to differ by
+    up to that much.
+    """
+    plan = SyncPlan(src, dst)
+    src_entries = snapshot(src, workers)
+    dst_entries = snapshot(dst, workers)
+    if not os.path.isdir(dst):
+        plan.transfer.dirs.append((src, dst))
+
+    for rel in sorted(src_entries):
+        kind, size, mtime_ns = src_entries[rel]
+        src_path = os.path.join(src, rel)
+        dst_path = os.path.join(dst, rel)
+        existing = dst_entries.get(rel)
+        if existing is not None and existing[0] != kind:
+            # A file replaced by a directory or the other way round
+            plan.delete.append(rel)
+            existing = None
+        if kind == 'dir':
+            if existing is None:
+                plan.new.append(rel)
+                plan.transfer.dirs.append((src_path, dst_path))
+            continue
+        if kind == 'link':
+            if existing is None:
+                plan.new.append(rel)
+                plan.transfer.links.append((os.readlink(src_path), dst_path))
+            continue
+        if existing is None:
+            plan.new.append(rel)
+        elif existing[1] != size or abs(existing[2] - mtime_ns) > mtime_window_ns:
+            plan.changed.append(rel)
+        elif checksum and _digest(src_path, hash_cache) != _digest(dst_path, hash_cache):
+            plan.changed.append(rel)
+        else:
+            continue
+        plan.transfer.files.append((size, src_path, dst_path))
+        plan.transfer.total_size += size
+
+    if delete:
+        # Only list the top of each extra subtree; removing it takes the rest
+        removed = set(plan.delete)
+        for rel in sorted(rel for rel in dst_entries if rel not in src_entries):
+            if not _inside(rel, removed):
+                plan.delete.append(rel)
+                removed.add(rel)
+    return plan
+
+def _inside(rel, parents):
+    parent = os.path.dirname(rel)
+    while parent:
+        if parent in parents:
+            return True
+        parent = os.path.dirname(parent)
+    return False
+
+def _digest(path, hash_cache):
+    return cached_hash(path, os.stat(path), 'blake2b', hash_cache)
@@ -0,0 +1,188 @@
+import os
+import stat
+import errno
+from concurrent.futures import ThreadPoolExecutor
+from metrics import count
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+# Kernel copies are issued in slices so progress can be reported between them
+KERNEL_CHUNK = 8 * 1024 * 1024
+
+def _copy_file_range(fsrc, fdst, progress):
+    while True:
+        copied = os.copy_file_range(fsrc, fdst, KERNEL_CHUNK)
+        if copied == 0:
+            return
+        count(read_bytes=copied, write_bytes=copied)
+        if progress:
+            progress.update(copied)
+
+def _sendfile(fsrc, fdst, progress):
+    offset = os.lseek(fsrc, 0, os.SEEK_CUR)
+    try:
+        while True:
+            sent = os.sendfile(fdst, fsrc, offset, KERNEL_CHUNK)
+            if sent == 0:
+                return
+            offset += sent
+            count(read_bytes=sent, write_bytes=sent)
+            if progress:
+                progress.update(sent)
+    finally:
+        # sendfile leaves the source position alone; sync it for any fallback
+        os.lseek(fsrc, offset, os.SEEK_SET)
+
+def _buffered_copy(fsrc, fdst, progress, buffer_size, digest=None):
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    while True:
+        n = fsrc.readinto(buf)
+        if not n:
+            return
+        fdst.write(view[:n])
+        if digest:
+            digest.update(view[:n])
+        if progress:
+            progress.update(n)
+
+def _copy_contents(fsrc, fdst, progress, buffer_size):
+    src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+    for kernel_copy in (getattr(os, 'copy_file_range', None) and _copy_file_range,
+                        getattr(os, 'sendfile', None) and _sendfile):
+        if not kernel_copy:
+            continue
+        try:
+            kernel_copy(src_fd, dst_fd, progress)
+            return
+        except OSError:
+            continue
+    _buffered_copy(fsrc, fdst, progress, buffer_size)
+
+def _copy_to(fsrc, dst, progress, buffer_size, digest):
+    with open(dst, 'wb') as fdst:
+        try:
+            if digest is not None:
+                _buffered_copy(fsrc, fdst, progress, buffer_size, digest)
+            else:
+                _copy_contents(fsrc, fdst, progress, buffer_size)
+        except BaseException:
+            # Do not leave a truncated file behind after an error or cancellation
+            fdst.close()
+            os.remove(dst)
+            raise
+
+def copy_file(src, dst, progress=None, buffer_size=DEFAULT_BUFFER_SIZE, verify=None, cache=None):
+    """Copy file contents and metadata, reporting bytes copied to progress.
+
+    Tries os.copy_file_range and then os.sendfile so the data stays in the
+    kernel, and falls back to a buffered loop when neither is available or the
+    filesystem refuses (e.g. cross-device on older kernels). A fallback picks up
+    from wherever the previous method stopped.
+
+    With verify set to an algorithm name the data goes through the buffered
+    loop instead and is hashed as it streams past, so the source is read only
+    once; the copy is then hashed and a mismatch raises OSError(EIO). The digest is
+    stored in cache for both files so later checksums of either are free.
+    """
+    # shutil pulls in bz2, lzma and zlib, so it is only imported once a copy runs
+    import shutil
+    digest = None
+    if verify:
+        from checksum import new_hash, hash_file
+        digest = new_hash(verify)
+    with open(src, 'rb') as fsrc:
+        src_stat = os.fstat(fsrc.fileno())
+        try:
+            dst_stat = os.stat(dst)
+        except FileNotFoundError:
+            dst_stat = None
+        # Opening dst for writing would truncate the data about to be read
+        if dst_stat is not None and (dst_stat.st_dev, dst_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+            raise shutil.SameFileError(f"{src} and {dst} are the same file")
+        _copy_to(fsrc, dst, progress, buffer_size, digest)
+    shutil.copystat(src, dst)
+    if digest is None:
+        return
+    expected = digest.hexdigest()
+    if hash_file(dst, verify) != expected:
+        os.remove(dst)
+        raise OSError(errno.EIO, f"{verify} of the copy does not match the source")
+    if cache:
+        cache.put(src_stat, verify, expected)
+        cache.put(os.stat(dst), verify, expected)
+
+class TransferPlan:
+    """Directories, symlinks and files to create for a batch of copies, gathered in one walk"""
+
+    def __init__(self):
+        self.dirs = []
+        self.links = []
+        self.files = []
+        self.total_size = 0
+
+    def add(self, src, dst):
+        """Add a file, or a directory tree merged into dst"""
+        st = os.stat(src)
+        if not stat.S_ISDIR(st.st_mode):
+            self.files.append((st.st_size, src, dst))
+            self.total_size += st.st_size
+            return
+        self.dirs.append((src, dst))
+        stack = [(src, dst)]
+        while stack:
+            src_dir, dst_dir = stack.pop()
+            with os.scandir(src_dir) as it:
+                for entry in it:
+                    count(entries=1)
+                    target = os.path.join(dst_dir, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        self.dirs.append((entry.path, target))
+                        stack.append((entry.path, target))
+                    elif entry.is_symlink() and entry.is_dir():
+                        self.links.append((os.readlink(entry.path), target))
+                    else:
+                        try:
+                            count(stats=1)
+                            size = entry.stat().st_size
+                        except OSError:
+                            # Broken symlink
+                            continue
+                        self.files.append((size, entry.path, target))
+                        self.total_size += size
+
+def run_plan(plan, workers=4, progress=None, buffer_size=DEFAULT_BUFFER_SIZE, verify=None, cache=None):
+    """Execute a TransferPlan and return a list of (src, error) for files that failed.
+
+    The directory skeleton is created first, then files are copied on a bounded
+    pool largest-first so big files do not end up trailing on one worker. A
+    failing file (including one that fails verification) is recorded and the
+    rest of the batch carries on.
+    """
+    for _, dst_dir in plan.dirs:
+        os.makedirs(dst_dir, exist_ok=True)
+    for link_target, dst_link in plan.links:
+        if not os.path.lexists(dst_link):
+            os.symlink(link_target, dst_link)
+
+    def copy_one(item):
+        _, src, dst = item
+        try:
+            copy_file(src, dst, progress, buffer_size, verify, cache)
+        except OSError as e:
+            return src, e
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        failures = [failure for failure in pool.map(copy_one, sorted(plan.files, reverse=True)) if failure]
+    import shutil
+    # Directory times change while their contents are written, so set them last
+    for src_dir, dst_dir in reversed(plan.dirs):
+        shutil.copystat(src_dir, dst_dir)
+    return failures
+
+def same_device(src, dst):
+    """Whether src can be renamed to dst without copying"""
+    try:
+        return os.stat(src).st_dev == os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+    except OSError:
+        return False
@@ -0,0 +1,85 @@
+import os
+import heapq
+import threading
+from walker import parallel_walk
+from metrics import count
+
+class DiskUsage:
+    """Per-directory size and file-count totals for a tree, gathered by a parallel walk"""
+
+    def __init__(self, root, top=10):
+        self.root = root
+        self.top = top
+        self.dirs = {}
+        self.largest_files = []
+        self.errors = []
+        self._seen_inodes = set()
+        self._lock = threading.Lock()
+
+    def _visit(self, dir_path):
+        own = files = seen = stats = 0
+        subdirs = []
+        candidates = []
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                seen += 1
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    stats += 1
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if st.st_nlink > 1:
+                    # Count hardlinked files once, wherever they are found first
+                    key = (st.st_dev, st.st_ino)
+                    with self._lock:
+                        if key in self._seen_inodes:
+                            continue
+                        self._seen_inodes.add(key)
+                own += st.st_size
+                files += 1
+                candidates.append((st.st_size, entry.path))
+        count(entries=seen, stats=stats)
+        with self._lock:
+            self.dirs[dir_path] = [own, files, len(subdirs)]
+            for candidate in candidates:
+                if len(self.largest_files) < self.top:
+                    heapq.heappush(self.largest_files, candidate)
+                elif candidate > self.largest_files[0]:
+                    heapq.heapreplace(self.largest_files, candidate)
+        return subdirs
+
+    def scan(self, workers=8):
+        self.errors = parallel_walk(self.root, self._visit, workers)
+        # Roll totals up from the deepest directories to the root
+        for dir_path in sorted(self.dirs, key=lambda path: path.count(os.sep), reverse=True):
+            if dir_path == self.root:
+                continue
+            parent = self.dirs.get(os.path.dirname(dir_path))
+            if parent is not None:
+                size, files, subdirs = self.dirs[dir_path]
+                parent[0] += size
+                parent[1] += files
+                parent[2] += subdirs
+        return self
+
+    def total(self, dir_path=None):
+        """Return (size, files, directories) for the tree rooted at dir_path"""
+        return tuple(self.dirs.get(dir_path or self.root, (0, 0, 0)))
+
+    def depth(self, dir_path):
+        return 0 if dir_path == self.root else os.path.relpath(dir_path, self.root).count(os.sep) + 1
+
+    def within_depth(self, max_depth):
+        """Return (path, size, files) for directories up to max_depth, largest first"""
+        rows = [(path, size, files) for path, (size, files, _) in self.dirs.items() if self.depth(path) <= max_depth]
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+
+    def largest_dirs(self):
+        rows = [(size, path) for path, (size, _, _) in self.dirs.items() if path != self.root]
+        return heapq.nlargest(self.top, rows)
+
+    def top_files(self):
+        return sorted(self.largest_files, reverse=True)
@@ -1,6 +1,8 @@
-import os
 import time
 import sys
+import stat
+import threading
+from jobs import current_job
 
 def clear_screen():
     print("\033[H\033[J", end="")
@@ -13,28 +15,83 @@ def format_size(size):
         size /= 1024
     return f"{size:.1f} TB"
 
+def parse_size(text):
+    """Convert a human-readable size such as 10MB or 1.5G to bytes"""
+    text = text.strip().upper()
+    if text.endswith('B'):
+        text = text[:-1]
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    multiplier = 1
+    if text and text[-1] in units:
+        multiplier = units[text[-1]]
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
 class COLOR:
     BLUE = '\033[94m'
     GREEN = '\033[92m'
     YELLOW = '\033[93m'
+    RED = '\033[91m'
     CYAN = '\033[96m'
     GRAY = '\033[90m'
     RESET = '\033[0m'
 
+def format_permissions(mode):
+    """Convert a st_mode value to an rwxrwxrwx string"""
+    perms = ''
+    perms += 'r' if mode & stat.S_IRUSR else '-'
+    perms += 'w' if mode & stat.S_IWUSR else '-'
+    perms += 'x' if mode & stat.S_IXUSR else '-'
+    perms += 'r' if mode & stat.S_IRGRP else '-'
+    perms += 'w' if mode & stat.S_IWGRP else '-'
+    perms += 'x' if mode & stat.S_IXGRP else '-'
+    perms += 'r' if mode & stat.S_IROTH else '-'
+    perms += 'w' if mode & stat.S_IWOTH else '-'
+    perms += 'x' if mode & stat.S_IXOTH else '-'
+    return perms
+
 def color_text(text, color):
     """Apply color to text"""
     return f"{color}{text}{COLOR.RESET}"
 
-def show_progress(src, dst, total_size, start_time, final=False):
-    """Show progress with percentage for file operations"""
-    if final:
-        elapsed = time.time() - start_time
-        speed = total_size / elapsed if elapsed > 0 else 0
-        print(f"\r100% - Completed in {elapsed:.2f}s ({format_size(speed)}/s)", end='')
-    else:
-        # Simulate progress for directories (not real-time due to shutil limitations)
-        elapsed = time.time() - start_time
-        if elapsed > 0:
-            processed = os.path.getsize(src) if os.path.isfile(src) else 0  # Simplified for demo
-            percent = min(100, int((processed / total_size) * 100) if total_size > 0 else 0)
-            print(f"\r{percent}% - Processing...", end='', flush=True)
\ No newline at end of file
+class Progress:
+    """Track bytes processed against a known total and print percentage and throughput.
+
+    Inside a background job the line is kept on the job instead of printed, and
+    every update is a cancellation point, whichever worker thread calls it.
+    """
+
+    def __init__(self, total_size, interval=0.2):
+        self.total_size = total_size
+        self.done = 0
+        self.start_time = time.time()
+        self.interval = interval
+        self.job = current_job()
+        self._last_print = self.start_time
+        self._lock = threading.Lock()
+
+    def update(self, nbytes):
+        if self.job:
+            self.job.check_cancelled()
+        with self._lock:
+            self.done += nbytes
+            now = time.time()
+            if now - self._last_print < self.interval:
+                return
+            self._last_print = now
+            elapsed = now - self.start_time
+            speed = self.done / elapsed if elapsed > 0 else 0
+            percent = min(100, int(self.done * 100 / self.total_size)) if self.total_size > 0 else 100
+            line = f"{percent}% - {format_size(self.done)} of {format_size(self.total_size)} ({format_size(speed)}/s)"
+            if self.job:
+                self.job.progress = line
+            else:
+                print(f"\r{line}", end='', flush=True)
+
+    def finish(self):
+        elapsed = time.time() - self.start_time
+        speed = self.done / elapsed if elapsed > 0 else 0
+        line = f"100% - {format_size(self.done)} in {elapsed:.2f}s ({format_size(speed)}/s)"
+        if self.job:
+            self.job.progress = line
+        print(f"\r{line}" + " " * 20)
@@ -0,0 +1,50 @@
+import queue
+import threading
+
+def parallel_walk(root, visit, workers=8):
+    """Call visit(dir_path) for every directory under root on a pool of threads.
+
+    visit returns the subdirectories to descend into. All threads pull from one
+    shared queue, so whichever thread is free picks up the next directory and a
+    single wide or deep branch never leaves the other threads idle. OSErrors
+    raised by visit are collected per directory and returned as (path, error);
+    any other exception stops the walk and is re-raised once the threads exit.
+    """
+    pending = queue.Queue()
+    pending.put(root)
+    errors = []
+    failure = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            dir_path = pending.get()
+            if dir_path is None:
+                pending.task_done()
+                return
+            try:
+                # After a failure, just drain what is queued so join() returns
+                if not failure:
+                    for subdir in visit(dir_path) or ():
+                        pending.put(subdir)
+            except OSError as e:
+                with lock:
+                    errors.append((dir_path, e))
+            except Exception as e:
+                with lock:
+                    if not failure:
+                        failure.append(e)
+            finally:
+                pending.task_done()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    pending.join()
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    if failure:
+        raise failure[0]
+    return errors
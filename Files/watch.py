@@ -0,0 +1,210 @@
+import os
+import time
+import errno
+import select
+import struct
+from listing import Entry
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+# Returned by changes() when the whole directory has to be listed again
+RESCAN = None
+
+class WatchGone(Exception):
+    """The watched directory was deleted or moved away"""
+
+def _load_inotify():
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        return libc if hasattr(libc, 'inotify_init1') else None
+    except (ImportError, OSError, AttributeError):
+        return None
+
+class InotifyWatcher:
+    """Changes to one directory's entries, read from inotify through ctypes"""
+
+    def __init__(self, path, libc):
+        import ctypes
+        self.path = path
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err), path)
+
+    def changes(self, timeout):
+        """Wait up to timeout seconds; return the set of changed names, or RESCAN"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        names = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    raise WatchGone(self.path)
+                if mask & IN_Q_OVERFLOW:
+                    return RESCAN
+                if name:
+                    names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollWatcher:
+    """Fallback that re-lists a directory only when its mtime changes.
+
+    Creating, deleting or renaming an entry changes the directory mtime, so an
+    idle directory costs one stat per interval. Writes to existing files do not
+    touch it, so every full_every intervals the entries are re-stat'ed too.
+    """
+
+    def __init__(self, path, full_every=10):
+        self.path = path
+        self.full_every = full_every
+        self._ticks = 0
+        self._mtime_ns = self._dir_mtime()
+        self._names = set(os.listdir(path))
+
+    def _dir_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            raise WatchGone(self.path)
+
+    def changes(self, timeout):
+        time.sleep(timeout)
+        self._ticks += 1
+        if self._ticks % self.full_every == 0:
+            self._mtime_ns = self._dir_mtime()
+            self._names = set(os.listdir(self.path))
+            return RESCAN
+        mtime_ns = self._dir_mtime()
+        if mtime_ns == self._mtime_ns:
+            return set()
+        self._mtime_ns = mtime_ns
+        names = set(os.listdir(self.path))
+        changed = names ^ self._names
+        self._names = names
+        return changed
+
+    def close(self):
+        pass
+
+def open_watcher(path, poll=False):
+    """Return an inotify watcher for path when available, else a polling one"""
+    libc = None if poll else _load_inotify()
+    if libc is not None:
+        try:
+            return InotifyWatcher(path, libc)
+        except OSError:
+            pass
+    return PollWatcher(path)
+
+def _signature(entry):
+    st = entry.stat
+    return st.st_mtime_ns, st.st_size, st.st_mode, entry.size
+
+class WatchedDirectory:
+    """In-memory listing of a directory that is patched entry by entry.
+
+    Each row keeps the stat it was built from, so a change only costs a stat
+    of that entry; totals are adjusted by the difference rather than summed
+    again. dir_size, when given, is called for directories (e.g. a SizeCache).
+    """
+
+    def __init__(self, path, type_filter=None, dir_size=None):
+        self.path = path
+        self.type_filter = type_filter
+        self.dir_size = dir_size
+        self.rows = {}
+        self.files = 0
+        self.dirs = 0
+        self.total_size = 0
+
+    def _load(self, name):
+        entry = Entry(os.path.join(self.path, name), name)
+        try:
+            entry.stat
+        except OSError:
+            # Gone again, or a broken symlink
+            return None
+        if self.type_filter and (self.type_filter == "dir") != entry.is_dir:
+            return None
+        if entry.is_dir and self.dir_size is not None:
+            try:
+                entry.size = self.dir_size(entry.path)
+            except OSError:
+                entry.size = None
+        return entry
+
+    def _add(self, entry):
+        self.rows[entry.name] = entry
+        if entry.is_dir:
+            self.dirs += 1
+        else:
+            self.files += 1
+        self.total_size += entry.size or 0
+
+    def _remove(self, name):
+        entry = self.rows.pop(name)
+        if entry.is_dir:
+            self.dirs -= 1
+        else:
+            self.files -= 1
+        self.total_size -= entry.size or 0
+        return entry
+
+    def load(self):
+        """List the directory from scratch; returns the changes against the previous rows"""
+        return self.apply(set(self.rows) | set(os.listdir(self.path)))
+
+    def apply(self, names):
+        """Re-stat only the given names and return a list of (change, entry).
+
+        change is 'added', 'removed' or 'changed'; rows whose stat did not
+        change are left alone and not reported.
+        """
+        deltas = []
+        for name in sorted(names):
+            old = self.rows.get(name)
+            new = self._load(name)
+            if old is None and new is None:
+                continue
+            if new is None:
+                deltas.append(("removed", self._remove(name)))
+            elif old is None:
+                self._add(new)
+                deltas.append(("added", new))
+            elif _signature(old) != _signature(new):
+                self._remove(name)
+                self._add(new)
+                deltas.append(("changed", new))
+        return deltas
@@ -0,0 +1,319 @@
+"""Benchmark the FileManager hot paths on synthetic trees.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --output new.json --compare results.json --threshold 0.15
+
+Every benchmark runs in its own subprocess so peak RSS is per benchmark. Wall
+time is the best of --repeat runs; syscall counts come from wrapping the os
+functions, the builtin open() and the entries scandir returns, and are
+reported per entry of the tree involved.
+"""
+import os
+import io
+import sys
+import builtins
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'Files'))
+sys.path.insert(0, HERE)
+
+import trees
+
+# name: (tree, command, setup, cleanup); setup and cleanup run untimed
+BENCHMARKS = {
+    'list_wide': ('wide', 'dir', None, None),
+    'list_small_deep_sizes': ('small', 'dir size:deep', None, None),
+    'dir_size_small': ('small', None, None, None),
+    'search_name_recursive': ('small', 'search file00 -r', None, None),
+    'search_content_recursive': ('small', f'search {trees.NEEDLE.decode()} -r -c', None, None),
+    'search_content_huge': ('huge', f'search {trees.NEEDLE.decode()} -c', None, None),
+    'copy_small': ('small', 'copy . ../bench-copy', None, '../bench-copy'),
+    'copy_huge': ('huge', 'copy . ../bench-copy', None, '../bench-copy'),
+    'compress_small': ('small', 'compress . ../bench.zip', None, '../bench.zip'),
+    'compress_huge': ('huge', 'compress . ../bench.zip', None, '../bench.zip'),
+    'decompress_small': ('small', 'decompress ../bench.zip ../bench-out', 'compress . ../bench.zip', '../bench-out'),
+    'delete_small': ('scratch', 'delmany small', 'small', None),
+    'delete_deep': ('scratch', 'delmany deep', 'deep', None),
+}
+
+COUNTED = ['stat', 'lstat', 'scandir', 'listdir', 'open', 'unlink', 'rmdir', 'mkdir', 'rename']
+
+class CountedEntry:
+    """DirEntry stand-in that counts the stat the first stat() (or lstat) call makes.
+
+    DirEntry caches its stat results and cannot be subclassed, so scandir
+    results are wrapped instead; is_dir() and friends use the type from the
+    directory listing and cost no syscall on Linux.
+    """
+
+    __slots__ = ('_entry', '_counts', '_stat', '_lstat', 'name', 'path')
+
+    def __init__(self, entry, counts):
+        self._entry = entry
+        self._counts = counts
+        self._stat = None
+        self._lstat = None
+        self.name = entry.name
+        self.path = entry.path
+
+    def stat(self, follow_symlinks=True):
+        if follow_symlinks:
+            if self._stat is None:
+                self._counts['stat'] += 1
+                self._stat = self._entry.stat()
+            return self._stat
+        if self._lstat is None:
+            self._counts['lstat'] += 1
+            self._lstat = self._entry.stat(follow_symlinks=False)
+        return self._lstat
+
+    def is_dir(self, follow_symlinks=True):
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def inode(self):
+        return self._entry.inode()
+
+    def __fspath__(self):
+        return self.path
+
+class SyscallCounter:
+    """Count calls to the os functions that map to filesystem syscalls.
+
+    The builtin open() counts as an 'open', and stat calls made through the
+    entries scandir returns count as 'stat'/'lstat'. scandir entries are also
+    counted as 'scandir_entries' so per-entry listing cost stays visible.
+    """
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTED + ['scandir_entries'], 0)
+        self._originals = {}
+
+    def _wrap(self, name, func):
+        def wrapper(*args, **kwargs):
+            self.counts[name] += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    def _wrap_scandir(self, func):
+        counter = self
+
+        class CountingScandir:
+            def __init__(self, *args, **kwargs):
+                counter.counts['scandir'] += 1
+                self._it = func(*args, **kwargs)
+
+            def __iter__(self):
+                return self
+
+            def __next__(self):
+                entry = next(self._it)
+                counter.counts['scandir_entries'] += 1
+                return CountedEntry(entry, counter.counts)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self._it.close()
+
+            def close(self):
+                self._it.close()
+
+        return CountingScandir
+
+    def __enter__(self):
+        for name in COUNTED:
+            self._originals[name] = getattr(os, name)
+            if name == 'scandir':
+                setattr(os, name, self._wrap_scandir(self._originals[name]))
+            else:
+                setattr(os, name, self._wrap(name, self._originals[name]))
+        self._builtin_open = builtins.open
+        builtins.open = self._wrap('open', builtins.open)
+        return self
+
+    def __exit__(self, *exc):
+        for name, func in self._originals.items():
+            setattr(os, name, func)
+        builtins.open = self._builtin_open
+
+    def total(self):
+        return sum(count for name, count in self.counts.items() if name != 'scandir_entries')
+
+def count_entries(path):
+    total = 0
+    for _, dirs, files in os.walk(path):
+        total += len(dirs) + len(files)
+    return total
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+def run_single(name, workdir, repeat):
+    """Run one benchmark in this process and return its result dict"""
+    from file_manager import FileManager
+
+    tree, command, setup, cleanup = BENCHMARKS[name]
+    trees_dir = os.path.join(workdir, 'trees')
+    scratch = os.path.join(workdir, 'scratch')
+    # Fresh caches per run; keep the index out of the user's home directory
+    config = {'use_colors': False, 'index_file': os.path.join(workdir, 'bench_index.db')}
+    best = None
+    counts = None
+    record = None
+    entries = 0
+    for _ in range(repeat):
+        if tree == 'scratch':
+            shutil.rmtree(scratch, ignore_errors=True)
+            os.makedirs(scratch)
+            shutil.copytree(os.path.join(trees_dir, setup), os.path.join(scratch, setup))
+            cwd = scratch
+            entries = count_entries(os.path.join(scratch, setup))
+        else:
+            cwd = os.path.join(trees_dir, tree)
+            entries = count_entries(cwd)
+        os.chdir(cwd)
+        fm = FileManager(config)
+        sink = io.StringIO()
+        if setup and tree != 'scratch':
+            with contextlib.redirect_stdout(sink):
+                fm.execute_command(setup)
+
+        counter = SyscallCounter()
+        with contextlib.redirect_stdout(sink), counter:
+            start = time.perf_counter()
+            if command is None:
+                fm.get_dir_size(cwd)
+            else:
+                fm.execute_command(command)
+            elapsed = time.perf_counter() - start
+        if "Unexpected error" in sink.getvalue() or "not found" in sink.getvalue():
+            raise RuntimeError(f"{name} failed: {sink.getvalue()[-500:]}")
+        if best is None or elapsed < best:
+            best = elapsed
+            counts = counter
+            # What the app itself counted, as a cross-check of the wrapped calls
+            record = fm.metrics.history[-1] if command is not None and fm.metrics.history else None
+        fm.close()
+        sink.truncate(0)
+        if cleanup:
+            target = os.path.normpath(os.path.join(cwd, cleanup))
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            elif os.path.exists(target):
+                os.remove(target)
+        if setup and tree != 'scratch' and os.path.exists(os.path.join(trees_dir, 'bench.zip')):
+            os.remove(os.path.join(trees_dir, 'bench.zip'))
+
+    return {
+        'wall_s': round(best, 6),
+        'entries': entries,
+        'syscalls': counts.total(),
+        'syscalls_per_entry': round(counts.total() / entries, 3) if entries else None,
+        'syscall_counts': counts.counts,
+        'app_entries': record.entries if record else None,
+        'app_stat_calls': record.stat_calls if record else None,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+def compare(results, baseline, threshold):
+    """Print per-benchmark change against a baseline and return the regressed names"""
+    regressions = []
+    print(f"\n{'Benchmark':<28} {'Baseline':>10} {'Current':>10} {'Change':>8}")
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old:
+            print(f"{name:<28} {'-':>10} {result['wall_s']:>10.3f} {'new':>8}")
+            continue
+        change = (result['wall_s'] - old['wall_s']) / old['wall_s'] if old['wall_s'] else 0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28} {old['wall_s']:>10.3f} {result['wall_s']:>10.3f} {change:>+7.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FileManager hot paths")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="baseline JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="allowed slowdown before a benchmark counts as a regression (default 0.10)")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply tree sizes by this factor")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark; the fastest is kept")
+    parser.add_argument('--workdir', help="where to generate trees (default: a temporary directory)")
+    parser.add_argument('--only', nargs='*', choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args.workdir, args.repeat)))
+        return 0
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='files-bench-')
+    print(f"Generating trees in {workdir} (scale {args.scale})...")
+    trees.generate(workdir, args.scale)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--single', name,
+                               '--workdir', workdir, '--repeat', str(args.repeat)],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name:<28} FAILED\n{proc.stderr.strip()}")
+            continue
+        results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+        result = results[name]
+        print(f"{name:<28} {result['wall_s']:>9.3f}s {result['syscalls_per_entry'] or 0:>8.2f} syscalls/entry "
+              f"{result['peak_rss_kb'] or 0:>9} KB peak")
+
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'scale': args.scale,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import os
+import shutil
+
+# Base sizes at --scale 1.0; every count and size is multiplied by the scale
+SMALL_DIRS = 40
+SMALL_FILES_PER_DIR = 250
+SMALL_FILE_SIZE = 1024
+HUGE_FILES = 3
+HUGE_FILE_SIZE = 64 * 1024 * 1024
+DEEP_LEVELS = 60
+DEEP_FILES_PER_LEVEL = 5
+WIDE_ENTRIES = 20000
+
+NEEDLE = b"benchmark-needle"
+
+def _text_block(size, seed):
+    line = f"line {seed} lorem ipsum dolor sit amet consectetur adipiscing elit\n".encode()
+    return (line * (size // len(line) + 1))[:size]
+
+def _scaled(value, scale):
+    return max(1, int(value * scale))
+
+def make_small_files(root, scale=1.0):
+    """Many small text files spread over a few directories; every 50th file has the needle"""
+    for d in range(_scaled(SMALL_DIRS, scale)):
+        dir_path = os.path.join(root, f"dir{d:03}")
+        os.makedirs(dir_path, exist_ok=True)
+        for f in range(_scaled(SMALL_FILES_PER_DIR, scale)):
+            data = _text_block(SMALL_FILE_SIZE, f)
+            if f % 50 == 0:
+                data = data[:-len(NEEDLE)] + NEEDLE
+            with open(os.path.join(dir_path, f"file{f:04}.txt"), 'wb') as out:
+                out.write(data)
+
+def make_huge_files(root, scale=1.0):
+    """A few large files, half compressible text and half random bytes"""
+    os.makedirs(root, exist_ok=True)
+    size = _scaled(HUGE_FILE_SIZE, scale)
+    for i in range(HUGE_FILES):
+        with open(os.path.join(root, f"huge{i}.{'log' if i % 2 == 0 else 'bin'}"), 'wb') as out:
+            written = 0
+            while written < size:
+                chunk = _text_block(1024 * 1024, i) if i % 2 == 0 else os.urandom(1024 * 1024)
+                chunk = chunk[:size - written]
+                out.write(chunk)
+                written += len(chunk)
+
+def make_deep(root, scale=1.0):
+    """A long chain of nested directories with a few files at every level"""
+    dir_path = root
+    for level in range(_scaled(DEEP_LEVELS, scale)):
+        dir_path = os.path.join(dir_path, f"level{level}")
+        os.makedirs(dir_path, exist_ok=True)
+        for f in range(DEEP_FILES_PER_LEVEL):
+            with open(os.path.join(dir_path, f"file{f}.txt"), 'wb') as out:
+                out.write(_text_block(256, level))
+
+def make_wide(root, scale=1.0):
+    """One directory with a very large number of empty files"""
+    os.makedirs(root, exist_ok=True)
+    for i in range(_scaled(WIDE_ENTRIES, scale)):
+        open(os.path.join(root, f"entry{i:06}.dat"), 'wb').close()
+
+TREES = {
+    'small': make_small_files,
+    'huge': make_huge_files,
+    'deep': make_deep,
+    'wide': make_wide,
+}
+
+def generate(workdir, scale=1.0):
+    """Create every synthetic tree under workdir/trees unless it already exists"""
+    trees_dir = os.path.join(workdir, 'trees')
+    marker = os.path.join(trees_dir, f".scale-{scale}")
+    if os.path.exists(marker):
+        return trees_dir
+    shutil.rmtree(trees_dir, ignore_errors=True)
+    for name, make in TREES.items():
+        make(os.path.join(trees_dir, name), scale)
+    open(marker, 'w').close()
+    return trees_dir